@@ -0,0 +1,123 @@
+from collections import namedtuple
+
+from query_parser import DETAIL_KEYWORDS
+
+# --- Precomputed /api/search answers ---
+# Every (species, requested detail) answer is rendered once per database version
+# instead of per request. Wording lives in DETAIL_TEMPLATES, one declarative
+# entry per (table, detail); AnswerTable renders them for every row, so
+# /api/search answers a resolved species with one dictionary lookup.
+#
+# Templates are str.format strings over the row's columns plus {label} (the
+# detail name with spaces, e.g. 'growth rate') and {value} (the column named
+# like the detail). `required` lists the columns that must be non-empty
+# for `message`; otherwise `missing` is used. None means "the detail's own
+# column", an empty tuple means "always use message".
+
+AnswerTemplate = namedtuple('AnswerTemplate', ['message', 'required', 'missing'])
+Answer = namedtuple('Answer', ['data', 'messages']) # Row as a dict, messages in AnswerTable.details order
+
+MISSING_VALUE_MESSAGE = "I don't have specific information about the {label} for {name}."
+UNKNOWN_DETAIL_MESSAGE = "I don't have specific information about '{label}' for {name}."
+
+
+def column_answer(message):
+    # A single-column detail: `message` when the column has a value, MISSING_VALUE_MESSAGE otherwise
+    return AnswerTemplate(message, None, MISSING_VALUE_MESSAGE)
+
+
+OVERVIEW_TEMPLATE = AnswerTemplate("{name}: {description}", (), None) # No detail asked for
+GENERIC_TEMPLATE = column_answer("The {label} for {name} is {value}.") # A column without its own entry
+UNKNOWN_DETAIL_TEMPLATE = AnswerTemplate(UNKNOWN_DETAIL_MESSAGE, (), None) # A detail the table has no column for
+
+DETAIL_TEMPLATES = {
+    'fish_species': {
+        'habitat': AnswerTemplate("{name} prefer temperatures of {habitat_temp} and a pH of {habitat_ph}.",
+                                  ('habitat_temp', 'habitat_ph'),
+                                  "I don't have specific habitat information for {name}."),
+        'compatibility': AnswerTemplate("{name} are {compatibility}.", (), None),
+        'min_tank_size_gal': column_answer("The minimum tank size for {name} is {value} gallons."),
+        'plant_needs': column_answer("For {name}, {value} are recommended."),
+        'filter_recommendation': column_answer("For {name}, {value} is usually recommended."),
+        'diet': column_answer("{name} are {value}."),
+    },
+    'plant_species': {
+        'co2_needed': column_answer("For {name}, CO2 is {value}."),
+        'care_level': column_answer("The care level for {name} is {value}."),
+        'lighting': column_answer("Regarding lighting for {name}: {value}."),
+        'placement': column_answer("The recommended placement for {name} is {value}."),
+        'growth_rate': column_answer("The growth rate for {name} is {value}."),
+    },
+}
+
+
+def _has_value(value):
+    return value is not None and str(value).strip() != ''
+
+
+def template_for(table_name, detail, columns):
+    if detail is None:
+        return OVERVIEW_TEMPLATE
+    template = DETAIL_TEMPLATES.get(table_name, {}).get(detail)
+    if template is not None:
+        return template
+    return GENERIC_TEMPLATE if detail in columns else UNKNOWN_DETAIL_TEMPLATE
+
+
+class AnswerTable:
+    def __init__(self, table_name, cursor, previous=None):
+        self.table_name = table_name
+        self.columns = [column[0] for column in cursor.description]
+        self.details = [None, *DETAIL_KEYWORDS]
+        self.detail_positions = {detail: position for position, detail in enumerate(self.details)}
+        self.answers = {} # row id -> Answer
+        self.rendered = 0
+        self.reused = 0
+
+        # Templates resolved once per table: (detail, label, required columns, message, missing)
+        self._plan = []
+        for detail in self.details:
+            template = template_for(table_name, detail, self.columns)
+            required = (detail,) if template.required is None else template.required
+            self._plan.append((detail, (detail or '').replace('_', ' '), required, template.message, template.missing))
+
+        # Incremental rebuild: rows whose values didn't change keep their rendered answers
+        if previous is not None and previous.columns != self.columns:
+            previous = None
+        id_position = self.columns.index('id')
+        for row in cursor:
+            row_id = row[id_position]
+            old = previous.answers.get(row_id) if previous is not None else None
+            if old is not None and tuple(old.data.values()) == tuple(row):
+                self.answers[row_id] = old
+                self.reused += 1
+            else:
+                self.answers[row_id] = self._render(row)
+                self.rendered += 1
+
+    def _render(self, row):
+        data = dict(zip(self.columns, row))
+        fields = dict(data) # One scratch dict per row; label/value are swapped in per detail
+        messages = []
+        for detail, label, required, message, missing in self._plan:
+            fields['label'] = label
+            fields['value'] = data.get(detail)
+            for column in required:
+                if not _has_value(data.get(column)):
+                    message = missing
+                    break
+            messages.append(message.format_map(fields))
+        return Answer(data, tuple(messages))
+
+    def lookup(self, row_id, detail=None):
+        # (row dict, message) for a resolved row, or None if the row is gone
+        answer = self.answers.get(row_id)
+        if answer is None:
+            return None
+        return answer.data, answer.messages[self.detail_positions[detail]]
+
+
+def build_answer_table(conn, table_name, previous=None):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table_name}")
+    return AnswerTable(table_name, cursor, previous)
@@ -1,94 +1,441 @@
-from flask import Flask, jsonify, g, request
+from flask import Flask, Response, abort, jsonify, g, request, send_from_directory, stream_with_context
 from flask_cors import CORS
-import sqlite3
-import re
-import string
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache, wraps
+
+from answers import build_answer_table
+from database import read_catalog_version
+from db_pool import ConnectionPool, DEFAULT_PRAGMAS
+from full_text import search_full_text
+from fuzzy import FuzzyMatcher
+from http_cache import ResponseCache, build_response
+from instrumentation import GaugeCallback, Histogram, Registry, setup_queue_logging, timed
+from name_index import build_name_index
+from query_parser import normalize_query, parse_query
+from snapshot import CatalogSnapshot, SnapshotError, default_snapshot_path
+from suggest import SearchPopularity, build_prefix_index
 
 # --- Configuration ---
-DATABASE = 'fish_info.db' 
+DATABASE = os.environ.get('FISH_INFO_DB', 'fish_info.db') # Override to serve another catalog (e.g. benchmarks)
+SEARCH_CACHE_SIZE = 1024 # Distinct normalized queries kept by the /api/search LRU cache
+DB_POOL_SIZE = 8 # Max pooled SQLite connections shared by all request threads
+DB_POOL_TIMEOUT = 5.0 # Seconds a request waits for a free connection
+DB_PRAGMAS = dict(DEFAULT_PRAGMAS) # e.g. DB_PRAGMAS['mmap_size'] = 0 to disable mmap
+RESPONSE_CACHE_SIZE = 2048 # Encoded catalog/detail responses kept in memory
+HTTP_CACHE_CONTROL = 'public, max-age=60, s-maxage=300' # Browsers revalidate after 1 min, CDNs after 5
+LIST_DEFAULT_FIELDS = ['id', 'name', 'description', 'image_url', 'image_thumb_url', 'image_srcset',
+                       'image_webp_srcset', 'image_avif_srcset'] # Columns returned by the list endpoints
+LIST_MAX_LIMIT = 500 # Largest page size accepted by ?limit=
+LIST_STREAM_BATCH_SIZE = 500 # Rows fetched per chunk in ?format=ndjson mode
+FULL_TEXT_RESULTS_LIMIT = 5 # Ranked results returned when /api/search can't resolve a name
+BATCH_MAX_ITEMS = 200 # Largest number of lookups accepted by /api/batch
+FUZZY_SUGGESTIONS_LIMIT = 5 # "Did you mean" names offered when a misspelling is ambiguous
+SUGGEST_DEFAULT_LIMIT = 8 # Completions returned by /api/suggest
+SUGGEST_MAX_LIMIT = 20 # Largest ?limit= accepted by /api/suggest
+IMAGE_BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images', 'build') # From build_images.py
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable' # Variant names change with their content
+SNAPSHOT_PATH = os.environ.get('FISH_INFO_SNAPSHOT', default_snapshot_path(DATABASE)) # From snapshot.py
+LOG_LEVEL = logging.INFO # Set to logging.DEBUG to log each /api/search parsing step
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
 
+# --- Logging and Metrics ---
+# Log records go through a queue and are written by a background thread (see instrumentation.py).
+setup_queue_logging(LOG_LEVEL)
+logger = logging.getLogger('aquarium')
+
+metrics = Registry()
+REQUEST_SECONDS = metrics.register(Histogram(
+    'aquarium_request_seconds', 'Time spent handling an API request.', ['endpoint', 'status']))
+STAGE_SECONDS = metrics.register(Histogram(
+    'aquarium_stage_seconds', 'Time spent in each stage of an API request.', ['endpoint', 'stage']))
+NAME_RESOLUTION_SECONDS = metrics.register(Histogram(
+    'aquarium_name_resolution_seconds', 'Species name lookups by table and the fallback attempt that matched.',
+    ['table', 'attempt']))
+_process_started = time.perf_counter() # Cold-start reference point for this worker
+_startup_seconds = {} # phase -> seconds: 'snapshot_load' and 'first_response'
+
+@app.before_request
+def start_request_timer():
+    g._request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('_request_started', None)
+    if started is not None and request.endpoint != 'get_metrics':
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or 'unmatched', # e.g. /favicon.ico
+                               response.status_code)
+    if 'first_response' not in _startup_seconds:
+        _startup_seconds['first_response'] = time.perf_counter() - _process_started
+        logger.info("Cold start: first response %.3fs after import (pid %d)",
+                    _startup_seconds['first_response'], os.getpid())
+    return response
+
 # --- Database Connection Management ---
+# Requests borrow a connection from a shared pool (see db_pool.py) instead of
+# opening a new one, and hand it back at teardown.
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE, size=DB_POOL_SIZE, pragmas=DB_PRAGMAS,
+                                       timeout=DB_POOL_TIMEOUT)
+    return _pool
+
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row # This makes query results accessible like dictionaries
+        db = g._database = get_pool().acquire()
     return db
 
 @app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        get_pool().release(db)
+
+# --- Species name indexes (built once, rebuilt when the database file changes) ---
+# Rebuilds run under a lock, so after a write one request rebuilds while the others wait for it.
+_name_indexes = {} # table_name -> (db signature, NameIndex)
+_name_indexes_lock = threading.Lock()
+
+def db_signature():
+    # Cheap change detector for fish_info.db: size and mtime of the file and its WAL
+    signature = []
+    for path in (DATABASE, DATABASE + '-wal'):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def get_name_index(table_name):
+    signature = db_signature()
+    cached = _name_indexes.get(table_name)
+    if cached is None or cached[0] != signature:
+        with _name_indexes_lock:
+            cached = _name_indexes.get(table_name)
+            if cached is None or cached[0] != signature:
+                cached = _name_indexes[table_name] = (signature, build_name_index(get_db(), table_name))
+    return cached[1]
 
 # --- Helper function to fetch data from a generic table ---
+def resolve_name(table_name, search_name_lower):
+    # One in-memory probe resolves exact, singular, " fish"/" plant" suffix and
+    # substring matches (see name_index.py) to a row id, or None
+    started = time.perf_counter()
+    row_id, attempt = get_name_index(table_name).resolve(search_name_lower)
+    NAME_RESOLUTION_SECONDS.observe(time.perf_counter() - started, table_name, attempt or 'miss')
+    return row_id
+
 def fetch_data_from_table(table_name, search_name_lower):
+    row_id = resolve_name(table_name, search_name_lower)
+    item = None # Item not found after all attempts
+    if row_id is not None: # A single primary-key fetch
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {table_name} WHERE id = ?", (row_id,))
+        item = cursor.fetchone()
+    return item
+
+# --- Catalog snapshot (reopened when the database or snapshot file changes) ---
+# A prebuilt, mmap'ed image of the catalog (see snapshot.py) answers the detail
+# and default list endpoints without touching SQLite. It is only used while its
+# catalog_id and data_version match the database's catalog_version; otherwise, or when no
+# snapshot was built, requests fall back to SQLite. Snapshot bodies are encoded
+# like jsonify() in production (compact); when jsonify() pretty-prints (debug
+# mode) the snapshot is skipped so responses don't change shape.
+_snapshot = None # (db signature, snapshot file signature, CatalogSnapshot or None, usable)
+_snapshot_lock = threading.Lock()
+
+def snapshot_file_signature():
+    try:
+        stat = os.stat(SNAPSHOT_PATH)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+def get_snapshot():
+    global _snapshot
+    signature = db_signature()
+    file_signature = snapshot_file_signature()
+    cached = _snapshot
+    if cached is None or cached[:2] != (signature, file_signature):
+        with _snapshot_lock:
+            cached = _snapshot
+            if cached is None or cached[:2] != (signature, file_signature):
+                cached = _snapshot = load_snapshot(cached, signature, file_signature)
+    if not cached[3] or not (app.json.compact or (app.json.compact is None and not app.debug)):
+        return None
+    return cached[2]
+
+def load_snapshot(cached, signature, file_signature):
+    started = time.perf_counter()
+    snapshot = None
+    if cached is not None and cached[1] == file_signature:
+        snapshot = cached[2] # Same file, only the database changed: re-check the version
+    elif file_signature is not None:
+        try:
+            snapshot = CatalogSnapshot(SNAPSHOT_PATH)
+        except (OSError, SnapshotError) as e:
+            logger.warning("Ignoring catalog snapshot: %s", e)
+    if cached is not None and cached[2] is not None and cached[2] is not snapshot:
+        close_snapshot(cached[2]) # Rebuilt or removed: unmap the old (possibly unlinked) file
+    usable = False
+    if snapshot is not None:
+        catalog_version = read_catalog_version(get_db().cursor())
+        usable = (snapshot.catalog_id, snapshot.data_version) == catalog_version
+        if not usable:
+            logger.warning("Catalog snapshot '%s' doesn't match the database (catalog %s version %s, database %s); "
+                           "serving from SQLite", SNAPSHOT_PATH, snapshot.catalog_id, snapshot.data_version,
+                           catalog_version)
+    _startup_seconds['snapshot_load'] = time.perf_counter() - started
+    return (signature, file_signature, snapshot, usable)
+
+def close_snapshot(snapshot):
+    # A request still reading the old snapshot sees its views released and falls back to SQLite
+    try:
+        snapshot.close()
+    except BufferError: # A slice is being read right now; the mapping goes away with the last reference
+        logger.debug("Catalog snapshot '%s' still in use; leaving it to be unmapped on release", snapshot.path)
+
+def snapshot_item_json(table_name, search_name_lower):
+    # Encoded detail body from the snapshot, or None to fall back to SQLite. Only
+    # alias matches are served here; substring matches go through resolve_name().
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    started = time.perf_counter()
+    snapshot_table = snapshot.tables[table_name]
+    try:
+        row_id, attempt = snapshot_table.resolve_alias(search_name_lower)
+        if row_id is None:
+            return None
+        body = snapshot_table.row_json(row_id)
+    except ValueError: # Closed by a concurrent reload
+        return None
+    NAME_RESOLUTION_SECONDS.observe(time.perf_counter() - started, table_name, attempt)
+    return body
+
+def snapshot_list_json(table_name):
+    snapshot = get_snapshot()
+    if snapshot is None or snapshot.list_fields != LIST_DEFAULT_FIELDS:
+        return None
+    try:
+        return snapshot.tables[table_name].list_json()
+    except ValueError: # Closed by a concurrent reload
+        return None
+
+# --- Precomputed search answers (rebuilt when the database file changes) ---
+# Only rows whose values changed are re-rendered on a rebuild (see answers.py).
+_answer_tables = {} # table_name -> (db signature, AnswerTable)
+_answer_tables_lock = threading.Lock()
+
+def get_answer_table(table_name):
+    signature = db_signature()
+    cached = _answer_tables.get(table_name)
+    if cached is None or cached[0] != signature:
+        with _answer_tables_lock:
+            cached = _answer_tables.get(table_name)
+            if cached is None or cached[0] != signature:
+                previous = cached[1] if cached is not None else None
+                cached = _answer_tables[table_name] = (signature, build_answer_table(get_db(), table_name, previous))
+    return cached[1]
+
+# --- Fuzzy name matching (rebuilt when the database file changes) ---
+# Spelling corrections across both tables for names that don't resolve (see fuzzy.py).
+SPECIES_TABLES = ['fish_species', 'plant_species']
+_fuzzy_matcher = None # (db signature, FuzzyMatcher)
+_fuzzy_matcher_lock = threading.Lock()
+
+def get_fuzzy_matcher():
+    global _fuzzy_matcher
+    signature = db_signature()
+    cached = _fuzzy_matcher
+    if cached is None or cached[0] != signature:
+        with _fuzzy_matcher_lock:
+            cached = _fuzzy_matcher
+            if cached is None or cached[0] != signature:
+                name_indexes = {table_name: get_name_index(table_name) for table_name in SPECIES_TABLES}
+                cached = _fuzzy_matcher = (signature, FuzzyMatcher(name_indexes))
+    return cached[1]
+
+# --- Typeahead prefix index (rebuilt when the database file changes) ---
+# Completions are ranked by how often each species answered a search in this process.
+_prefix_index = None # (db signature, PrefixIndex)
+_prefix_index_lock = threading.Lock()
+_search_popularity = SearchPopularity()
+
+def get_prefix_index():
+    global _prefix_index
+    signature = db_signature()
+    cached = _prefix_index
+    if cached is None or cached[0] != signature:
+        with _prefix_index_lock:
+            cached = _prefix_index
+            if cached is None or cached[0] != signature:
+                cached = _prefix_index = (signature, build_prefix_index(get_db(), SPECIES_TABLES))
+    return cached[1]
+
+# --- HTTP caching for the catalog and detail endpoints ---
+# Responses are cached as encoded JSON keyed on route, lowercased name and query
+# string, and served with an ETag so repeat visits get an empty 304.
+_response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+def cached_json_response(view):
+    @wraps(view)
+    def wrapper(**kwargs):
+        key = (request.endpoint,
+               tuple(str(value).lower() for value in kwargs.values()),
+               tuple(sorted(request.args.items(multi=True))))
+        with timed(STAGE_SECONDS, request.endpoint, 'cache_lookup'):
+            signature = db_signature()
+            entry = _response_cache.get(key, signature)
+        if entry is None:
+            with timed(STAGE_SECONDS, request.endpoint, 'handler'):
+                response = app.make_response(view(**kwargs))
+            if response.is_streamed: # Streams are never buffered into the cache
+                return response
+            entry = _response_cache.put(key, signature, response.get_data(), response.status_code)
+        with timed(STAGE_SECONDS, request.endpoint, 'respond'):
+            return build_response(entry, HTTP_CACHE_CONTROL)
+    return wrapper
+
+# --- Helper function to get all items from a generic table ---
+# Rows come back in (name COLLATE NOCASE, id) order, which the idx_*_name_nocase
+# indexes created by database.py serve directly. `after` is a (name, id) keyset
+# cursor: only rows sorting after it are returned.
+def query_items_from_table(table_name, fields=LIST_DEFAULT_FIELDS, after=None, limit=None):
+    columns = list(fields) + [key for key in ('id', 'name') if key not in fields] # Needed for cursors
+    sql = f"SELECT {', '.join(columns)} FROM {table_name}"
+    params = []
+    if after is not None:
+        sql += " WHERE name >= ? COLLATE NOCASE AND (name > ? COLLATE NOCASE OR id > ?)"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY name COLLATE NOCASE, id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
     conn = get_db()
     cursor = conn.cursor()
+    cursor.execute(sql, params)
+    return cursor
 
-    # Attempt 1: Exact match on the detected name (e.g., 'guppies')
-    cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) = ?", (search_name_lower,))
-    item = cursor.fetchone()
-    if item:
-        return item
-
-    # Attempt 2: Try singularizing (e.g., 'guppies' -> 'guppy')
-    # This is a very basic pluralization/singularization attempt
-    if search_name_lower.endswith('ies'): # e.g., guppies -> guppy
-        singular_candidate = search_name_lower[:-3] + 'y'
-        cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) = ?", (singular_candidate,))
-        item = cursor.fetchone()
-        if item:
-            return item
-    elif search_name_lower.endswith('s'): # e.g., Bettas -> Betta, Tetras -> Tetra
-        singular_candidate = search_name_lower[:-1]
-        cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) = ?", (singular_candidate,))
-        item = cursor.fetchone()
-        if item:
-            return item
-            
-    # Attempt 3: Try appending " Fish" or " Plant" (capitalize for consistency with DB names)
-    # This handles cases where NLP extracted "Betta" but DB has "Betta Fish"
-    if table_name == 'fish_species' and ' fish' not in search_name_lower:
-        full_name_candidate = search_name_lower + ' fish'
-        cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) = ?", (full_name_candidate,))
-        item = cursor.fetchone()
-        if item:
-            return item
-    elif table_name == 'plant_species' and ' plant' not in search_name_lower:
-        full_name_candidate = search_name_lower + ' plant'
-        cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) = ?", (full_name_candidate,))
-        item = cursor.fetchone()
-        if item:
-            return item
+def get_all_items_from_table(table_name, fields=LIST_DEFAULT_FIELDS, after=None, limit=None):
+    cursor = query_items_from_table(table_name, fields, after, limit)
+    return cursor.fetchall()
 
-    # Attempt 4: Try a LIKE search (less precise but more forgiving)
-    # This could lead to multiple matches, but for simple exact names, it can help with minor variations
-    cursor.execute(f"SELECT * FROM {table_name} WHERE LOWER(name) LIKE ?", (f"%{search_name_lower}%",))
-    item = cursor.fetchone() # Get the first best match
-    if item:
-        return item
+def project_item(row, fields):
+    return {field: row[field] for field in fields}
 
-    return None # Item not found after all attempts
+def encode_list_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row['name'], row['id']]).encode()).decode()
 
-# --- Helper function to get all items from a generic table ---
-def get_all_items_from_table(table_name):
+SQLITE_MIN_INTEGER, SQLITE_MAX_INTEGER = -2 ** 63, 2 ** 63 - 1 # Larger ints can't be bound as parameters
+
+def decode_list_cursor(token):
+    try:
+        name, row_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.") from None
+    if not isinstance(name, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor.")
+    if not SQLITE_MIN_INTEGER <= row_id <= SQLITE_MAX_INTEGER:
+        raise ValueError("Invalid cursor.")
+    return name, row_id
+
+def get_table_columns(table_name):
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute(f"SELECT id, name, description, image_url FROM {table_name} ORDER BY name COLLATE NOCASE")
-    return [dict(item) for item in cursor.fetchall()]
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    return [row['name'] for row in cursor.fetchall()]
+
+def parse_list_args(table_name):
+    # ?fields=a,b  ?limit=N  ?cursor=<next_cursor>  ?format=ndjson
+    fields = LIST_DEFAULT_FIELDS
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in get_table_columns(table_name)]
+        if unknown or not fields:
+            raise ValueError(f"Unknown fields: {', '.join(unknown) or '(none given)'}.")
+
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError: # e.g. 'abc' or '²' (which isdigit() accepts)
+            limit = None
+        if limit is None or not 1 <= limit <= LIST_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {LIST_MAX_LIMIT}.")
+
+    after = None
+    if request.args.get('cursor'):
+        after = decode_list_cursor(request.args['cursor'])
+
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        raise ValueError("format must be 'json' or 'ndjson'.")
+    return fields, after, limit, output_format == 'ndjson'
+
+def stream_items_ndjson(cursor, fields):
+    # Rows are pulled from the cursor in batches, so memory stays flat whatever the table size
+    while True:
+        rows = cursor.fetchmany(LIST_STREAM_BATCH_SIZE)
+        if not rows:
+            break
+        yield ''.join(app.json.dumps(project_item(row, fields)) + '\n' for row in rows)
+
+def list_items_response(table_name):
+    try:
+        fields, after, limit, stream = parse_list_args(table_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not request.args: # Default list: served ready-made from the snapshot when there is one
+        with timed(STAGE_SECONDS, request.endpoint, 'snapshot'):
+            body = snapshot_list_json(table_name)
+        if body is not None:
+            return Response(body, mimetype='application/json')
+
+    if stream:
+        cursor = query_items_from_table(table_name, fields, after, limit)
+        return Response(stream_with_context(stream_items_ndjson(cursor, fields)), mimetype='application/x-ndjson')
+
+    with timed(STAGE_SECONDS, request.endpoint, 'db_query'):
+        rows = get_all_items_from_table(table_name, fields, after, limit)
+    with timed(STAGE_SECONDS, request.endpoint, 'serialize'):
+        items = [project_item(row, fields) for row in rows]
+        if limit is None and after is None: # Plain list, as the frontend expects
+            return jsonify(items)
+
+        next_cursor = encode_list_cursor(rows[-1]) if limit is not None and len(rows) == limit else None
+        return jsonify({"items": items, "next_cursor": next_cursor})
 
 # --- API Endpoint: Get All Fish Species ---
 @app.route('/api/fishes', methods=['GET'])
+@cached_json_response
 def get_all_fishes():
-    return jsonify(get_all_items_from_table('fish_species'))
+    return list_items_response('fish_species')
 
 # --- API Endpoint: Get Details for a Single Fish Species ---
 @app.route('/api/fish/<string:species_name>', methods=['GET'])
+@cached_json_response
 def get_fish_detail(species_name):
+    with timed(STAGE_SECONDS, request.endpoint, 'snapshot'):
+        body = snapshot_item_json('fish_species', species_name.lower())
+    if body is not None:
+        return Response(body, mimetype='application/json')
     fish_info = fetch_data_from_table('fish_species', species_name.lower())
     if fish_info:
         return jsonify(dict(fish_info))
@@ -97,184 +444,232 @@ def get_fish_detail(species_name):
 
 # NEW API Endpoints for Plants ---
 @app.route('/api/plants', methods=['GET'])
+@cached_json_response
 def get_all_plants():
-    return jsonify(get_all_items_from_table('plant_species'))
+    return list_items_response('plant_species')
 
 @app.route('/api/plant/<string:plant_name>', methods=['GET'])
+@cached_json_response
 def get_plant_detail(plant_name):
+    with timed(STAGE_SECONDS, request.endpoint, 'snapshot'):
+        body = snapshot_item_json('plant_species', plant_name.lower())
+    if body is not None:
+        return Response(body, mimetype='application/json')
     plant_info = fetch_data_from_table('plant_species', plant_name.lower())
     if plant_info:
         return jsonify(dict(plant_info))
     else:
         return jsonify({"error": "Plant species not found."}), 404
 
+# --- API Endpoint: Batch Lookup ---
+# Resolves many {type, name} / {type, id} entries in one request. Names go through
+# the in-memory name index (exact, plural, suffix and substring forms), then each
+# table is read with a single "WHERE id IN (...)" query. Results keep input order.
+BATCH_TYPES = {'fish': 'fish_species', 'plant': 'plant_species'}
+
+def batch_result(entry, data):
+    return {"type": entry['type'], "name": entry.get('name'), "id": entry.get('id'),
+            "found": data is not None, "data": data}
+
+@app.route('/api/batch', methods=['POST'])
+def batch_lookup():
+    payload = request.get_json(silent=True)
+    entries = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        return jsonify({"error": "Expected a JSON list of {type, name} or {type, id} objects (or {\"items\": [...]})."}), 400
+    if len(entries) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"A batch can hold at most {BATCH_MAX_ITEMS} items."}), 400
+
+    results = [None] * len(entries)
+    wanted_ids = {table_name: set() for table_name in BATCH_TYPES.values()}
+    resolved = [] # (position, table_name, row id)
+
+    for position, entry in enumerate(entries):
+        entry_type = entry.get('type') if isinstance(entry, dict) else None
+        table_name = BATCH_TYPES.get(entry_type) if isinstance(entry_type, str) else None # Lists etc. aren't hashable
+        if table_name is None:
+            results[position] = {"found": False, "error": "Each item needs a type of 'fish' or 'plant'."}
+            continue
+
+        row_id = entry.get('id')
+        name = entry.get('name')
+        if isinstance(row_id, int) and not SQLITE_MIN_INTEGER <= row_id <= SQLITE_MAX_INTEGER:
+            results[position] = {"found": False, "error": "'id' must fit in a signed 64-bit integer."}
+            continue
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            if not isinstance(name, str) or not name.strip():
+                results[position] = {"found": False, "error": "Each item needs a 'name' string or an integer 'id'."}
+                continue
+            row_id, _ = get_name_index(table_name).resolve(name.lower())
+            if row_id is None:
+                results[position] = batch_result(entry, None)
+                continue
+
+        wanted_ids[table_name].add(row_id)
+        resolved.append((position, table_name, row_id))
+
+    rows = {} # (table_name, row id) -> row dict
+    conn = get_db()
+    cursor = conn.cursor()
+    for table_name, ids in wanted_ids.items():
+        if ids:
+            placeholders = ', '.join('?' * len(ids))
+            cursor.execute(f"SELECT * FROM {table_name} WHERE id IN ({placeholders})", list(ids))
+            for row in cursor.fetchall():
+                rows[(table_name, row['id'])] = dict(row)
+
+    for position, table_name, row_id in resolved:
+        results[position] = batch_result(entries[position], rows.get((table_name, row_id)))
+
+    return jsonify({"results": results})
+
 # --- NEW API Endpoint: Unified Search ---
 # This endpoint will handle the search bar input and figure out what user is asking for.
 @app.route('/api/search', methods=['POST'])
 def search_info():
     user_query = request.json.get('query', '').lower()
-    print(f"--- Incoming user_query: '{user_query}'")
+    logger.debug("Incoming user_query: %r", user_query)
     
     if not user_query:
         return jsonify({"response": "Please enter a search query."}), 400
 
     # Clean the query (remove trailing punctuation, standardize spaces)
-    user_query = user_query.rstrip(string.punctuation).strip()
-    user_query = ' '.join(user_query.split())
-    print(f"--- Cleaned user_query: '{user_query}'")
-
+    with timed(STAGE_SECONDS, 'search_info', 'normalize'):
+        user_query = normalize_query(user_query)
+    logger.debug("Cleaned user_query: %r", user_query)
+
+    # Repeated phrasings are answered from the LRU cache, skipping parsing and the DB
+    with timed(STAGE_SECONDS, 'search_info', 'lookup'):
+        response_data = search_response(user_query, db_signature())
+    if response_data['type'] in SPECIES_TABLES: # Feeds the /api/suggest ranking
+        _search_popularity.record(response_data['type'], response_data['data']['name'])
+    with timed(STAGE_SECONDS, 'search_info', 'serialize'):
+        return jsonify(response_data)
+
+# --- API Endpoint: Typeahead Suggestions ---
+# GET /api/suggest?q=neon&limit=5 -> {"query": "neon", "suggestions": [{"name": "Neon Tetra", "type": "fish_species"}]}
+@app.route('/api/suggest', methods=['GET'])
+def suggest_names():
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', SUGGEST_DEFAULT_LIMIT))
+    except ValueError: # isdigit() alone lets through characters like '²' that int() rejects
+        limit = None
+    if limit is None or not 1 <= limit <= SUGGEST_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {SUGGEST_MAX_LIMIT}."}), 400
+
+    with timed(STAGE_SECONDS, 'suggest_names', 'complete'):
+        suggestions = get_prefix_index().complete(query, limit, _search_popularity)
+    return jsonify({"query": query,
+                    "suggestions": [{"name": suggestion.name, "type": suggestion.table} for suggestion in suggestions]})
+
+# --- Cached search resolution ---
+# db_signature is part of the cache key so entries go stale as soon as fish_info.db changes.
+# The returned dicts are shared between requests and must not be mutated.
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def search_response(user_query, signature):
     response_data = {"type": "general_info", "data": None, "message": ""}
 
-    # --- NLP: Identify Category and Item Name ---
-    detected_item_name = None
-    target_table = None
-    requested_detail = None 
-
-    # 1. Check for specific detail requests and remove them from query for name extraction
-    detail_keywords = {
-        'diet': ['diet', 'eat', 'food'],
-        'habitat': ['habitat', 'water', 'temperature', 'ph'],
-        'compatibility': ['compatible', 'compatibility', 'other fish'],
-        'min_tank_size_gal': ['tank size', 'size of tank'],
-        'plant_needs': ['plants', 'plantation'], # For fish needs
-        'filter_recommendation': ['filter', 'filtering'],
-        'care_level': ['care level', 'care'], # For plants
-        'lighting': ['lighting'],
-        'co2_needed': ['co2'],
-        'placement': ['placement'],
-        'growth_rate': ['growth rate', 'growth']
-    }
+    # --- NLP: Identify Category, Item Name and Requested Detail (see query_parser.py) ---
+    with timed(STAGE_SECONDS, 'search_info', 'parse_intent'):
+        detected_item_name, target_table, requested_detail = parse_query(user_query)
 
-    cleaned_query_for_name = user_query
-    for detail, keywords in detail_keywords.items():
-        for keyword in keywords:
-            if keyword in user_query:
-                requested_detail = detail
-                # Ensure replacement handles multi-word keywords and doesn't remove too much
-                cleaned_query_for_name = cleaned_query_for_name.replace(keyword, '').strip()
-                break 
-        if requested_detail:
-            break
-    
-    cleaned_query_for_name = ' '.join(cleaned_query_for_name.split()) # Re-clean spaces
-
-    # 2. Determine if it's a fish or plant query and extract item name
-    # Check for explicit category mentions
-    is_plant_explicit = any(k in user_query for k in ["plant", "fern", "anubias", "anacharis"])
-    is_fish_explicit = any(k in user_query for k in ["fish", "betta", "guppy", "tetra"])
-
-    # Try to extract the item name using regex. This regex tries to capture text
-    # that is likely the name, before certain keywords or end of string.
-    # It attempts to capture multiple words.
-    name_regex_patterns = [
-        r'(?:about|for|what is|tell me about|show me)\s+([\w\s]+?)(?:\s+(?:fish|plant)|\?|\.|$)', # "tell me about Betta Fish"
-        r'([\w\s]+?)(?:\s+(?:fish|plant)|\?|\.|$)', # "Betta Fish" or "Java Fern" followed by category/punctuation
-        r'([\w\s]+)' # Fallback: capture any remaining words as a name candidate
-    ]
-    
-    for pattern in name_regex_patterns: # Corrected variable name here
-        match = re.search(pattern, cleaned_query_for_name)
-        if match:
-            detected_item_name = match.group(1).strip()
-            # If a very short word is detected, but a longer candidate exists in query, prefer longer
-            if len(detected_item_name.split()) == 1 and len(cleaned_query_for_name.split()) > 1:
-                # Try to take the longest sequence of capitalized words if they were initially capitalized
-                # This is getting complex for rule-based, stick to direct matches
-                pass # Simple regex for now
-            break # Found a name, stop trying other patterns
-
-
-    # Refine detected_item_name and set target_table
-    if detected_item_name:
-        detected_item_name = detected_item_name.rstrip(string.punctuation).strip() # Clean again
-        detected_item_name = ' '.join([word.capitalize() for word in detected_item_name.split()]) # Capitalize fully
-        
-        # Try to guess table if not explicit:
-        if is_plant_explicit and not is_fish_explicit: # Explicitly plant, not fish
-            target_table = 'plant_species'
-        elif is_fish_explicit and not is_plant_explicit: # Explicitly fish, not plant
-            target_table = 'fish_species'
-        else: # Neither explicitly nor both explicit (e.g., "tell me about Betta Plant") - prioritize fish by default
-            target_table = 'fish_species' 
-            # Could add logic here to check if name exists in one table before defaulting
-
-    print(f"--- Detected item name: '{detected_item_name}'")
-    print(f"--- Target table (guessed): '{target_table}'")
-    print(f"--- Requested detail: '{requested_detail}'")
-
-    # --- Fetch Data based on Detection ---
-    item_info = None
+    logger.debug("Detected item name: %r, target table (guessed): %r, requested detail: %r",
+                 detected_item_name, target_table, requested_detail)
+
+    # --- Resolve the species, then look up its precomputed answer (see answers.py) ---
+    answer = None
     if detected_item_name and target_table:
-        print(f"--- Attempting to fetch '{detected_item_name.lower()}' from table '{target_table}'")
-        item_info = fetch_data_from_table(target_table, detected_item_name.lower())
-        if item_info:
-            print(f"--- Item found: {item_info['name']}")
+        with timed(STAGE_SECONDS, 'search_info', 'db_resolve'):
+            row_id = resolve_name(target_table, detected_item_name.lower())
+        if row_id is not None:
+            with timed(STAGE_SECONDS, 'search_info', 'answer_lookup'):
+                answer = get_answer_table(target_table).lookup(row_id, requested_detail)
+        if answer:
+            logger.debug("Item found: %s", answer[0]['name'])
         else:
-            print(f"--- Item NOT found in DB for query: '{detected_item_name.lower()}' in '{target_table}'")
+            logger.debug("Item NOT found in DB for query %r in %r", detected_item_name.lower(), target_table)
     else:
-        print(f"--- Skipping DB fetch: detected_item_name='{detected_item_name}', target_table='{target_table}'")
-
-    if item_info:
-        response_data['data'] = dict(item_info)
+        logger.debug("Skipping DB fetch: detected_item_name=%r, target_table=%r", detected_item_name, target_table)
+
+    # --- Typo tolerance: retry with spelling corrections across both tables ---
+    suggestions = []
+    if not answer and detected_item_name:
+        with timed(STAGE_SECONDS, 'search_info', 'fuzzy_match'):
+            matches = get_fuzzy_matcher().match(detected_item_name.lower(), target_table, FUZZY_SUGGESTIONS_LIMIT)
+        if len(matches) == 1 or (matches and matches[0].distance < matches[1].distance): # One clear winner
+            best = matches[0]
+            answer = get_answer_table(best.table).lookup(best.row_id, requested_detail)
+            if answer:
+                logger.debug("Fuzzy match for %r: %r (%d edits)", detected_item_name, best.phrase, best.distance)
+                target_table = best.table
+                response_data['corrected_from'] = detected_item_name
+        else: # Ambiguous (or nothing): offer the candidates as "did you mean" suggestions
+            for match in matches:
+                found = get_answer_table(match.table).lookup(match.row_id)
+                if found:
+                    suggestions.append({"name": found[0]['name'], "type": match.table})
+
+    if answer:
+        response_data['data'], response_data['message'] = answer
         response_data['type'] = target_table
+    else: # No species by that name, fall back to BM25-ranked full-text search over both tables
+        with timed(STAGE_SECONDS, 'search_info', 'full_text'):
+            results = search_full_text(get_db(), user_query, FULL_TEXT_RESULTS_LIMIT)
+        if results:
+            response_data['type'] = 'search_results'
+            response_data['results'] = results
+            response_data['message'] = f"I couldn't find a species called '{detected_item_name if detected_item_name else user_query}', but these look relevant:"
+        else: # Item not found at all
+            response_data['message'] = f"I couldn't find information for '{detected_item_name if detected_item_name else user_query}'. Please try another name or phrase."
+            response_data['type'] = 'error'
+        if suggestions:
+            response_data['suggestions'] = suggestions
+
+    return response_data
+
+# --- Static Route: Built Image Variants ---
+# Files written by build_images.py carry a content hash in their name, so browsers
+# and CDNs may cache them forever; list/detail responses link them via image_*_url
+# and the image_*srcset columns.
+@app.route('/images/build/<path:filename>', methods=['GET'])
+def get_image_variant(filename):
+    if filename == 'manifest.json': # Not content-hashed, so not immutable
+        abort(404)
+    response = send_from_directory(IMAGE_BUILD_DIR, filename)
+    response.headers['Cache-Control'] = IMAGE_CACHE_CONTROL
+    return response
+
+# --- API Endpoint: Prometheus Metrics ---
+def _pool_samples():
+    stats = get_pool().stats()
+    return {(key,): value for key, value in stats.items()}
+
+def _cache_samples():
+    search_cache = search_response.cache_info()
+    return {
+        ('response', 'hits'): _response_cache.hits,
+        ('response', 'misses'): _response_cache.misses,
+        ('search', 'hits'): search_cache.hits,
+        ('search', 'misses'): search_cache.misses,
+        ('search', 'size'): search_cache.currsize,
+    }
+
+metrics.register(GaugeCallback('aquarium_db_pool', 'Connection pool counters (opened, checkouts, waits, ...).',
+                               _pool_samples, ['stat']))
+def _startup_samples():
+    return {(phase,): seconds for phase, seconds in _startup_seconds.items()}
+
+metrics.register(GaugeCallback('aquarium_startup_seconds', 'Worker start-up timings (snapshot load, first response).',
+                               _startup_samples, ['phase']))
+metrics.register(GaugeCallback('aquarium_cache', 'Response and search cache counters.',
+                               _cache_samples, ['cache', 'stat']))
 
-        if requested_detail: # If a specific detail was asked
-            # Handle complex/multi-column details first (like habitat)
-            if target_table == 'fish_species' and requested_detail == 'habitat': # NEW specific check for habitat for fish
-                if item_info['habitat_temp'] and item_info['habitat_ph']:
-                    response_data['message'] = f"{item_info['name']} prefer temperatures of {item_info['habitat_temp']} and a pH of {item_info['habitat_ph']}."
-                else:
-                    response_data['message'] = f"I don't have specific habitat information for {item_info['name']}."
-            elif target_table == 'fish_species' and requested_detail == 'compatibility': # NEW specific check for compatibility
-                 response_data['message'] = f"{item_info['name']} are {item_info['compatibility']}."
-            # ... add more special cases here if needed ...
-
-            else: # Handle details that map directly to single columns in a robust way
-                try: 
-                    detail_value = item_info[requested_detail] # Use [] for sqlite3.Row
-                    if detail_value is not None and str(detail_value).strip() != '':
-                        # Specific formatting for common types (tank size, measurements)
-                        if target_table == 'fish_species':
-                            if requested_detail == 'min_tank_size_gal':
-                                response_data['message'] = f"The minimum tank size for {item_info['name']} is {detail_value} gallons."
-                            elif requested_detail == 'plant_needs':
-                                response_data['message'] = f"For {item_info['name']}, {detail_value} are recommended."
-                            elif requested_detail == 'filter_recommendation':
-                                response_data['message'] = f"For {item_info['name']}, {detail_value} is usually recommended."
-                            elif requested_detail == 'diet': # Direct match (e.g. "Guppy diet")
-                                response_data['message'] = f"{item_info['name']} are {item_info['diet']}."
-                            else: # Fallback for other direct column details
-                                response_data['message'] = f"The {requested_detail.replace('_', ' ')} for {item_info['name']} is {detail_value}."
-                        
-                        elif target_table == 'plant_species':
-                            if requested_detail == 'co2_needed':
-                                response_data['message'] = f"For {item_info['name']}, CO2 is {detail_value}."
-                            elif requested_detail == 'care_level':
-                                response_data['message'] = f"The care level for {item_info['name']} is {detail_value}."
-                            elif requested_detail == 'lighting':
-                                response_data['message'] = f"Regarding lighting for {item_info['name']}: {detail_value}."
-                            elif requested_detail == 'placement':
-                                response_data['message'] = f"The recommended placement for {item_info['name']} is {detail_value}."
-                            elif requested_detail == 'growth_rate':
-                                response_data['message'] = f"The growth rate for {item_info['name']} is {detail_value}."
-                            else: # Generic plant detail
-                                response_data['message'] = f"The {requested_detail.replace('_', ' ')} for {item_info['name']} is {detail_value}."
-                    else: # If column exists but its value is None or empty string
-                        response_data['message'] = f"I don't have specific information about the {requested_detail.replace('_', ' ')} for {item_info['name']}."
-                except KeyError:
-                    response_data['message'] = f"I don't have specific information about '{requested_detail.replace('_', ' ')}' for {item_info['name']}."
-                except Exception as e:
-                    print(f"ERROR: Unexpected error accessing detail '{requested_detail}' for {item_info['name']}: {e}")
-                    response_data['message'] = f"An internal error occurred while fetching details for {item_info['name']}."
-
-        else: # No specific detail requested, provide full description
-            response_data['message'] = f"{item_info['name']}: {item_info['description']}"
-    else: # Item not found at all
-        response_data['message'] = f"I couldn't find information for '{detected_item_name if detected_item_name else user_query}'. Please try another name or phrase."
-        response_data['type'] = 'error'
-
-    return jsonify(response_data)
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # --- Run the Flask App ---
 if __name__ == '__main__':
+    # Development server only; use `python serve.py` for multi-worker (ASGI or WSGI) serving
     app.run(debug=True, port=5000) # Runs on http://127.0.0.1:5000
\ No newline at end of file
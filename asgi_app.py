@@ -0,0 +1,208 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+
+import app as flask_app
+
+# --- Async (ASGI) serving mode ---
+# An ASGI front for the Flask API, run with an ASGI server such as uvicorn
+# (see serve.py). The event loop only does socket I/O; every request is handed
+# to the Flask app on a bounded thread pool sized to the SQLite connection pool,
+# so the pooled read-only connections are reused and the loop never blocks on
+# sqlite3. Routes, caching headers and CORS therefore behave exactly like the
+# WSGI app.
+#
+# Concurrent identical read requests (same method, path, query, body and
+# COALESCING_HEADERS) for the routes in COALESCED_ENDPOINTS are coalesced: the
+# first one runs, the others await its result instead of queueing more DB work.
+
+COALESCED_ENDPOINTS = {
+    'search_info',      # POST /api/search
+    'get_all_fishes',   # GET /api/fishes
+    'get_fish_detail',  # GET /api/fish/<name>
+    'get_all_plants',   # GET /api/plants
+    'get_plant_detail', # GET /api/plant/<name>
+    'suggest_names',    # GET /api/suggest
+}
+
+# Request headers the response depends on: flask-cors echoes Origin (and the
+# preflight headers) back, Content-Type decides 415 vs 200 for /api/search,
+# If-None-Match decides 304 vs 200.
+COALESCING_HEADERS = {
+    b'origin',
+    b'content-type',
+    b'if-none-match',
+    b'access-control-request-method',
+    b'access-control-request-headers',
+}
+
+_executor = ThreadPoolExecutor(max_workers=flask_app.DB_POOL_SIZE, thread_name_prefix='db-worker')
+_in_flight = {} # coalescing key -> asyncio.Future of (status, headers, body)
+_url_adapter = flask_app.app.url_map.bind('localhost')
+
+
+def _build_environ(scope, body):
+    # Minimal PEP 3333 environ for one ASGI HTTP request
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'), # Decoded, as WSGI expects (not raw_path)
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ, on_start, on_chunk):
+    # Runs on a worker thread: the whole WSGI call, including iterating a streamed
+    # body, stays on one thread so Flask's request context is never split across threads.
+    response_start = {}
+
+    def start_response(status, headers, exc_info=None):
+        response_start['status'] = int(status.split(' ', 1)[0])
+        response_start['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                     for name, value in headers]
+
+    iterable = flask_app.app(environ, start_response)
+    try:
+        started = False
+        for chunk in iterable:
+            if not started:
+                on_start(response_start['status'], response_start['headers'])
+                started = True
+            if chunk:
+                on_chunk(chunk)
+        if not started:
+            on_start(response_start['status'], response_start['headers'])
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def _run_buffered(environ):
+    result = {}
+    chunks = []
+
+    def on_start(status, headers):
+        result['status'] = status
+        result['headers'] = headers
+
+    _run_wsgi(environ, on_start, chunks.append)
+    return result['status'], result['headers'], b''.join(chunks)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _coalescing_key(scope, body):
+    try:
+        endpoint, _ = _url_adapter.match(scope['path'], method=scope['method'])
+    except HTTPException: # 404/405 and redirects are left to Flask itself
+        return None
+    if endpoint not in COALESCED_ENDPOINTS or b'format=ndjson' in scope.get('query_string', b''):
+        return None
+    headers = tuple(sorted((name.lower(), value) for name, value in scope.get('headers', [])
+                           if name.lower() in COALESCING_HEADERS))
+    return (scope['method'], scope['path'], scope.get('query_string', b''), body, headers)
+
+
+async def _handle_coalesced(key, environ):
+    future = _in_flight.get(key)
+    if future is None: # First request with this key: run it, later identical ones share the result
+        future = asyncio.get_running_loop().run_in_executor(_executor, _run_buffered, environ)
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    # shield() so a client disconnecting doesn't cancel work other requests are waiting on
+    return await asyncio.shield(future)
+
+
+async def _handle_streamed(environ, send):
+    # Chunks produced on the worker thread are passed to the event loop through a queue
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def on_start(status, headers):
+        loop.call_soon_threadsafe(events.put_nowait, ('start', (status, headers)))
+
+    def on_chunk(chunk):
+        loop.call_soon_threadsafe(events.put_nowait, ('body', chunk))
+
+    worker = loop.run_in_executor(_executor, _run_wsgi, environ, on_start, on_chunk)
+    worker.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, ('done', None)))
+
+    while True:
+        kind, payload = await events.get()
+        if kind == 'start':
+            await send({'type': 'http.response.start', 'status': payload[0], 'headers': payload[1]})
+        elif kind == 'body':
+            await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+        else:
+            break
+    await worker # Re-raises any error from the Flask app
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=True)
+            if flask_app._pool is not None:
+                flask_app._pool.close_all()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    body = await _read_body(receive)
+    if body is None: # Client went away before sending the full request
+        return
+    environ = _build_environ(scope, body)
+
+    key = _coalescing_key(scope, body)
+    if key is None:
+        await _handle_streamed(environ, send)
+        return
+
+    status, headers, response_body = await _handle_coalesced(key, environ)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': response_body})
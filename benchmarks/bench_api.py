@@ -0,0 +1,336 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# --- API benchmark and load test ---
+# Builds synthetic catalogs with the database.py schema, replays a realistic
+# query mix against the API and reports throughput and p50/p95/p99 latency.
+#
+#   python benchmarks/bench_api.py                          # 1k and 100k rows, in-process
+#   python benchmarks/bench_api.py --sizes 1000000 --mode server --concurrency 16
+#   python benchmarks/bench_api.py --output new.json --compare old.json
+#
+# In-process mode drives Flask's test client (no network, one thread). Server
+# mode starts the app on a local port in a subprocess and sends real HTTP
+# requests from a thread pool. Generated databases are kept in benchmarks/data/
+# and reused. --compare exits with status 1 when any request kind's p95
+# regressed by more than --threshold against an earlier results file.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import add_sample_fish_data, add_sample_plant_data, create_database  # noqa: E402
+from import_catalog import import_catalog  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+DEFAULT_SIZES = [1000, 100000]
+FISH_SHARE = 0.8 # Fraction of synthetic rows that are fish, the rest are plants
+FULL_LIST_MAX_ROWS = 10000 # Above this, list requests page with ?limit= instead of fetching everything
+
+FISH_BASES = ['Guppy', 'Neon Tetra', 'Betta', 'Corydoras', 'Platy', 'Molly', 'Swordtail',
+              'Danio', 'Rasbora', 'Gourami', 'Angelfish', 'Discus', 'Oscar', 'Pleco', 'Loach']
+PLANT_BASES = ['Java Fern', 'Anubias Nana', 'Anacharis', 'Java Moss', 'Amazon Sword',
+               'Cryptocoryne', 'Vallisneria', 'Hornwort', 'Duckweed', 'Water Wisteria']
+VARIETIES = ['Red', 'Blue', 'Golden', 'Albino', 'Dwarf', 'Giant', 'Longfin', 'Spotted', 'Marble',
+             'Black', 'Green', 'Calico', 'Koi', 'Panda', 'Lemon']
+DETAILS = ['diet', 'tank size', 'habitat', 'compatibility', 'filter', 'care level', 'lighting', 'co2']
+
+
+# --- Synthetic catalogs ---
+# Rows are a pure function of their index, so the query mix can name row i directly.
+def fish_row(i):
+    base = FISH_BASES[i % len(FISH_BASES)]
+    name = f"{VARIETIES[(i // len(FISH_BASES)) % len(VARIETIES)]} {base} {i}"
+    if i % 4 == 0:
+        name += ' Fish' # These only match a bare name through the " fish" suffix attempt
+    return {
+        'name': name,
+        'description': f"A {'peaceful' if i % 3 else 'semi-aggressive'} {base.lower()} variety, number {i}.",
+        'habitat_temp': '72-78°F (22-26°C)', 'habitat_ph': '6.5-7.5',
+        'diet': 'Omnivore (flakes, frozen foods)',
+        'compatibility': 'Peaceful; good with community fish.' if i % 3 else 'Best kept with robust tank mates.',
+        'min_tank_size_gal': 5 + (i % 12) * 5,
+        'plant_needs': 'Moderately planted', 'filter_recommendation': 'Sponge or hang-on-back filter',
+    }
+
+
+def plant_row(i):
+    base = PLANT_BASES[i % len(PLANT_BASES)]
+    name = f"{VARIETIES[(i // len(PLANT_BASES)) % len(VARIETIES)]} {base} {i}"
+    if i % 4 == 0:
+        name += ' Plant'
+    return {
+        'name': name,
+        'description': f"A {'hardy' if i % 2 else 'demanding'} {base.lower()} variety, number {i}.",
+        'care_level': 'Easy' if i % 2 else 'Medium', 'lighting': ['Low', 'Medium', 'High'][i % 3],
+        'co2_needed': 'No' if i % 2 else 'Yes', 'placement': 'Midground', 'growth_rate': 'Slow',
+    }
+
+
+def split_size(size):
+    fish_count = int(size * FISH_SHARE)
+    return fish_count, size - fish_count
+
+
+def build_database(size):
+    # Returns the path of a catalog with `size` synthetic rows (plus the sample species)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"catalog_{size}.db")
+    if os.path.exists(path):
+        return path
+    print(f"Generating {size}-row catalog at {path} ...")
+    create_database(path)
+    add_sample_fish_data(path)
+    add_sample_plant_data(path)
+    fish_count, plant_count = split_size(size)
+    import_catalog(path, 'fish_species', (fish_row(i) for i in range(fish_count)))
+    import_catalog(path, 'plant_species', (plant_row(i) for i in range(plant_count)))
+    return path
+
+
+# --- Query mix ---
+# Each request is (kind, method, path, json body); kinds group the report.
+def query_mix(size, count, seed=1):
+    rng = random.Random(seed)
+    fish_count, plant_count = split_size(size)
+    list_suffix = '' if size <= FULL_LIST_MAX_ROWS else '?limit=100'
+
+    def search(kind, query):
+        return (kind, 'POST', '/api/search', {'query': query})
+
+    def random_fish():
+        return fish_row(rng.randrange(fish_count)) if fish_count else {'name': 'Guppy'}
+
+    def random_plant():
+        return plant_row(rng.randrange(plant_count)) if plant_count else {'name': 'Java Fern'}
+
+    requests = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.16: # Exact name
+            requests.append(search('search_exact', random_fish()['name']))
+        elif roll < 0.24: # Plural of an exact name
+            requests.append(search('search_plural', rng.choice(['guppies', 'neon tetras', 'java ferns', 'anubias nanas'])))
+        elif roll < 0.32: # Matches only once " fish" is appended
+            name = random_fish()['name']
+            requests.append(search('search_suffix', name[:-len(' Fish')] if name.endswith(' Fish') else 'betta'))
+        elif roll < 0.40: # Species plus a detail question
+            requests.append(search('search_detail', f"{random_fish()['name']} {rng.choice(DETAILS)}"))
+        elif roll < 0.48: # Only the substring (old LIKE) attempt hits: "<base> <j>" is inside row j's name
+            j = rng.randrange(max(fish_count, 1))
+            requests.append(search('search_like', f"{FISH_BASES[j % len(FISH_BASES)].lower()} {j}"))
+        elif roll < 0.54: # Nothing matches
+            requests.append(search('search_miss', f"zq{rng.randrange(10 ** 6)}x"))
+        elif roll < 0.62:
+            requests.append(('list_fish', 'GET', '/api/fishes' + list_suffix, None))
+        elif roll < 0.66:
+            requests.append(('list_plants', 'GET', '/api/plants' + list_suffix, None))
+        elif roll < 0.86:
+            requests.append(('fish_detail', 'GET', '/api/fish/' + urllib.parse.quote(random_fish()['name']), None))
+        else:
+            requests.append(('plant_detail', 'GET', '/api/plant/' + urllib.parse.quote(random_plant()['name']), None))
+    return requests
+
+
+# --- Runners ---
+def run_in_process(db_path, requests, cold):
+    os.environ['FISH_INFO_DB'] = db_path
+    import app as app_module
+    if app_module.DATABASE != db_path: # app was already imported for another catalog size
+        app_module.DATABASE = db_path
+        if app_module._pool is not None:
+            app_module._pool.close_all()
+            app_module._pool = None
+        # The snapshot belongs to the previous catalog; look for this catalog's own
+        if app_module._snapshot is not None and app_module._snapshot[2] is not None:
+            app_module.close_snapshot(app_module._snapshot[2])
+        app_module._snapshot = None
+        app_module.SNAPSHOT_PATH = app_module.default_snapshot_path(db_path)
+    client = app_module.app.test_client()
+
+    timings = []
+    started = time.perf_counter()
+    for kind, method, path, body in requests:
+        if cold: # Measure the uncached path: drop the response and search caches first
+            app_module._response_cache.clear()
+            app_module.search_response.cache_clear()
+        request_started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        timings.append((kind, time.perf_counter() - request_started, response.status_code))
+    return timings, time.perf_counter() - started
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, port):
+    env = dict(os.environ, FISH_INFO_DB=db_path)
+    command = [sys.executable, '-c',
+               f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Server did not start within 30s")
+
+
+def run_against_server(db_path, requests, concurrency):
+    port = _free_port()
+    process = start_server(db_path, port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    def send(request_spec):
+        kind, method, path, body = request_spec
+        data = json.dumps(body).encode() if body is not None else None
+        http_request = urllib.request.Request(base_url + path, data=data, method=method,
+                                              headers={'Content-Type': 'application/json'})
+        request_started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        return kind, time.perf_counter() - request_started, status
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(send, requests))
+        return timings, time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+# --- Reporting ---
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings, elapsed):
+    by_kind = {}
+    for kind, seconds, status in timings:
+        by_kind.setdefault(kind, []).append((seconds, status))
+    by_kind['all'] = [(seconds, status) for _, seconds, status in timings]
+
+    summary = {}
+    for kind, samples in sorted(by_kind.items()):
+        latencies = sorted(seconds for seconds, _ in samples)
+        summary[kind] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, status in samples if status >= 500),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        }
+    summary['all']['throughput_rps'] = round(len(timings) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def print_summary(label, summary):
+    print(f"\n{label}  ({summary['all']['throughput_rps']} req/s)")
+    print(f"  {'kind':<14}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for kind, stats in summary.items():
+        print(f"  {kind:<14}{stats['requests']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['errors']:>8}")
+
+
+def compare(previous, current, threshold):
+    # Returns a list of human-readable regressions (p95 slower by more than `threshold`)
+    regressions = []
+    for run_key, run in current['runs'].items():
+        old_run = previous.get('runs', {}).get(run_key)
+        if not old_run:
+            continue
+        for kind, stats in run['summary'].items():
+            old_stats = old_run['summary'].get(kind)
+            if old_stats and old_stats['p95_ms'] > 0 and stats['p95_ms'] > old_stats['p95_ms'] * (1 + threshold):
+                regressions.append(f"{run_key} {kind}: p95 {old_stats['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Aquarium Info Hub API.")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated catalog sizes, e.g. 1000,100000,1000000")
+    parser.add_argument('--mode', choices=['inprocess', 'server', 'both'], default='inprocess')
+    parser.add_argument('--requests', type=int, default=5000, help="Requests per run")
+    parser.add_argument('--concurrency', type=int, default=8, help="Client threads in server mode")
+    parser.add_argument('--cold', action='store_true', help="Clear the app's caches before every in-process request")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    parser.add_argument('--compare', help="Earlier results file to check for p95 regressions")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed p95 slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    modes = ['inprocess', 'server'] if args.mode == 'both' else [args.mode]
+    results = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'requests_per_run': args.requests,
+        'cold': args.cold,
+        'runs': {},
+    }
+    for size in [int(size) for size in args.sizes.split(',')]:
+        db_path = build_database(size)
+        requests = query_mix(size, args.requests, args.seed)
+        for mode in modes:
+            if mode == 'inprocess':
+                timings, elapsed = run_in_process(db_path, requests, args.cold)
+            else:
+                timings, elapsed = run_against_server(db_path, requests, args.concurrency)
+            run_key = f"{mode}-{size}"
+            summary = summarize(timings, elapsed)
+            results['runs'][run_key] = {'size': size, 'mode': mode, 'elapsed_s': round(elapsed, 3), 'summary': summary}
+            print_summary(run_key, summary)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo p95 regressions.")
@@ -0,0 +1,249 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import DATABASE_NAME, SPECIES_COLUMNS, ensure_image_columns
+
+try:
+    from PIL import Image, ImageOps
+except ImportError: # Pillow is only needed to build the variants, not to serve them
+    Image = None
+
+# --- Image build pipeline ---
+# Turns the full-size photos in images/ into small, cacheable variants:
+#
+#   python build_images.py                 # build what changed, then update fish_info.db
+#   python build_images.py --force         # rebuild everything
+#   python build_images.py --workers 4 --db other.db
+#
+# Every source gets a 'thumb' (list cards) and a 'detail' (detail pages) size,
+# each encoded as JPEG, WebP and, when Pillow can write it, AVIF. Output files
+# are named after a hash of their content (guppy.thumb.1a2b3c4d5e.webp), so the
+# API can serve images/build/ with immutable cache headers: a changed photo
+# gets a new URL instead of a stale cached copy.
+#
+# images/build/manifest.json records each source's hash and its variants.
+# Sources whose hash (and the build settings) are unchanged are skipped; the
+# rest are encoded in a process pool. Finally each species row whose name
+# matches a source file name (e.g. 'Neon Tetra' -> neon-tetra.jpg, or an
+# IMAGE_OVERRIDES entry) gets image_detail_url, image_thumb_url and the srcset
+# columns pointed at the variants; the seeded image_url is left alone, since
+# re-running database.py resets it. Requires Pillow (`pip install Pillow`).
+#
+# images/build/ is a build artifact (git-ignored): run this after cloning and
+# whenever photos change, before serving the API.
+
+SOURCE_DIR = 'images'
+BUILD_DIR = os.path.join(SOURCE_DIR, 'build')
+MANIFEST_PATH = os.path.join(BUILD_DIR, 'manifest.json')
+URL_PREFIX = '/images/build/' # Served by app.py's get_image_variant route
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+VARIANT_WIDTHS = {'thumb': 400, 'detail': 960} # Max widths in px; smaller sources are never upscaled
+FORMATS = {
+    # name: (Pillow format, file extension, save options)
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+}
+HASH_LENGTH = 10
+
+# Species whose photo doesn't follow the name -> file name convention
+IMAGE_OVERRIDES = {
+    ('plant_species', 'Anubias Nana'): 'anubais-nana.jpg',
+}
+
+
+def available_formats():
+    Image.init()
+    return [name for name, (pil_format, _, _) in FORMATS.items() if pil_format in Image.SAVE]
+
+
+def build_settings(formats):
+    # Changing any of these invalidates every manifest entry
+    return {'widths': VARIANT_WIDTHS, 'formats': {name: FORMATS[name][2] for name in formats}}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _write_if_missing(path, data):
+    if os.path.exists(path): # Same content hash, same bytes
+        return
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_variants(source_path, source_hash, formats, build_dir=BUILD_DIR):
+    # Runs in a worker process: decode once, then resize and encode every variant
+    stem = slugify(os.path.splitext(os.path.basename(source_path))[0])
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    variants = {}
+    for variant, max_width in VARIANT_WIDTHS.items():
+        width = min(max_width, image.width)
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        files = {}
+        for name in formats:
+            pil_format, extension, options = FORMATS[name]
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            data = buffer.getvalue()
+            filename = f"{stem}.{variant}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.{extension}"
+            _write_if_missing(os.path.join(build_dir, filename), data)
+            files[name] = filename
+        variants[variant] = {'width': width, 'height': height, 'files': files}
+    return {'hash': source_hash, 'width': image.width, 'height': image.height, 'variants': variants}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'settings': None, 'images': {}}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(temp_path, path)
+
+
+def _entry_is_current(entry, source_hash, build_dir):
+    if entry is None or entry['hash'] != source_hash:
+        return False
+    return all(os.path.exists(os.path.join(build_dir, filename))
+               for variant in entry['variants'].values() for filename in variant['files'].values())
+
+
+def build_images(source_dir=SOURCE_DIR, build_dir=BUILD_DIR, workers=None, force=False):
+    os.makedirs(build_dir, exist_ok=True)
+    manifest_path = os.path.join(build_dir, 'manifest.json')
+    manifest = load_manifest(manifest_path)
+    formats = available_formats()
+    settings = build_settings(formats)
+    if manifest.get('settings') != settings:
+        force = True
+
+    sources = sorted(name for name in os.listdir(source_dir)
+                     if name.lower().endswith(SOURCE_EXTENSIONS) and os.path.isfile(os.path.join(source_dir, name)))
+    images = {}
+    pending = {}
+    for name in sources:
+        source_hash = file_hash(os.path.join(source_dir, name))
+        entry = manifest['images'].get(name)
+        if not force and _entry_is_current(entry, source_hash, build_dir):
+            images[name] = entry
+        else:
+            pending[name] = source_hash
+
+    started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(build_variants, os.path.join(source_dir, name), source_hash,
+                                             formats, build_dir)
+                       for name, source_hash in pending.items()}
+            for name, future in futures.items():
+                images[name] = future.result()
+                print(f"  built {name}")
+
+    # Drop variants no longer referenced (old hashes, deleted sources)
+    referenced = {filename for entry in images.values()
+                  for variant in entry['variants'].values() for filename in variant['files'].values()}
+    removed = 0
+    for filename in os.listdir(build_dir):
+        if filename != 'manifest.json' and filename not in referenced:
+            os.remove(os.path.join(build_dir, filename))
+            removed += 1
+
+    manifest = {'settings': settings, 'images': dict(sorted(images.items()))}
+    save_manifest(manifest, manifest_path)
+
+    source_bytes = sum(os.path.getsize(os.path.join(source_dir, name)) for name in sources)
+    thumb_bytes = sum(os.path.getsize(os.path.join(build_dir, entry['variants']['thumb']['files'][formats[-1]]))
+                      for entry in images.values())
+    print(f"Built {len(pending)} of {len(sources)} images ({', '.join(formats)}) in "
+          f"{time.perf_counter() - started:.2f}s; {len(sources) - len(pending)} unchanged, {removed} stale files removed. "
+          f"Sources {source_bytes / 1024:,.0f} KiB, {formats[-1]} thumbnails {thumb_bytes / 1024:,.0f} KiB.")
+    return manifest
+
+
+def image_columns_for(entry):
+    # Column values for one manifest entry; srcset candidates are 'url <width>w'
+    def url(variant, name):
+        return URL_PREFIX + entry['variants'][variant]['files'][name]
+
+    def srcset(name):
+        if name not in entry['variants']['thumb']['files']:
+            return None
+        return ', '.join(f"{url(variant, name)} {entry['variants'][variant]['width']}w"
+                         for variant in VARIANT_WIDTHS)
+
+    return {
+        'image_detail_url': url('detail', 'jpeg'),
+        'image_thumb_url': url('thumb', 'jpeg'),
+        'image_srcset': srcset('jpeg'),
+        'image_webp_srcset': srcset('webp'),
+        'image_avif_srcset': srcset('avif'),
+    }
+
+
+def update_database(manifest, db_path=DATABASE_NAME):
+    sources_by_slug = {slugify(os.path.splitext(name)[0]): name for name in manifest['images']}
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    updated = 0
+    for table_name in SPECIES_COLUMNS:
+        ensure_image_columns(cursor, table_name)
+        cursor.execute(f"SELECT * FROM {table_name}")
+        for row in cursor.fetchall():
+            source = IMAGE_OVERRIDES.get((table_name, row['name'])) or sources_by_slug.get(slugify(row['name']))
+            if source not in manifest['images']:
+                continue # No photo for this species; the frontend falls back to image_url
+            values = image_columns_for(manifest['images'][source])
+            if all(row[column] == value for column, value in values.items()):
+                continue # Unchanged rows aren't rewritten, so the API's caches stay valid
+            assignments = ', '.join(f"{column} = ?" for column in values)
+            cursor.execute(f"UPDATE {table_name} SET {assignments} WHERE id = ?", (*values.values(), row['id']))
+            updated += 1
+    conn.commit()
+    conn.close()
+    print(f"Updated image columns for {updated} species in '{db_path}'.")
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build resized, content-hashed image variants.")
+    parser.add_argument('--workers', type=int, help="Encoder processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every image, not just changed ones")
+    parser.add_argument('--db', default=DATABASE_NAME, help=f"Database to update (default: {DATABASE_NAME})")
+    parser.add_argument('--no-db', action='store_true', help="Only build the files and manifest")
+    args = parser.parse_args()
+
+    if Image is None:
+        parser.exit(1, "Pillow is required to build images: pip install Pillow\n")
+    manifest = build_images(workers=args.workers, force=args.force)
+    if not args.no_db:
+        update_database(manifest, args.db)
@@ -1,11 +1,149 @@
+import secrets
 import sqlite3
 
 DATABASE_NAME = 'fish_info.db' # We'll keep the name for now, but it contains more than fish
 
-def create_database():
-    conn = sqlite3.connect(DATABASE_NAME)
+# Data columns of each species table (everything except the id), in insert order
+SPECIES_COLUMNS = {
+    'fish_species': ['name', 'description', 'habitat_temp', 'habitat_ph', 'diet', 'compatibility',
+                     'min_tank_size_gal', 'plant_needs', 'filter_recommendation', 'image_url'],
+    'plant_species': ['name', 'description', 'care_level', 'lighting', 'co2_needed', 'placement',
+                      'growth_rate', 'image_url'],
+}
+
+# Responsive image columns filled in by build_images.py (URLs of the generated variants).
+# They are derived data, so imports and seeds leave them alone.
+IMAGE_COLUMNS = ['image_detail_url', 'image_thumb_url', 'image_srcset', 'image_webp_srcset', 'image_avif_srcset']
+
+# Columns indexed by the full-text search tables ('<table>_fts'), name first so it can be weighted up
+FTS_COLUMNS = {
+    'fish_species': ['name', 'description', 'diet', 'compatibility', 'plant_needs',
+                     'filter_recommendation', 'habitat_temp', 'min_tank_size_gal'],
+    'plant_species': ['name', 'description', 'care_level', 'lighting', 'co2_needed',
+                      'placement', 'growth_rate'],
+}
+
+# --- Full-text search (FTS5) helpers ---
+# Each species table gets an external-content FTS5 table, so the text is not
+# stored twice, plus triggers that keep it in sync on INSERT/UPDATE/DELETE.
+def create_fts_table(cursor, table_name):
+    columns = ', '.join(FTS_COLUMNS[table_name])
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table_name}_fts USING fts5(
+            {columns}, content='{table_name}', content_rowid='id', tokenize='porter unicode61'
+        )
+    ''')
+
+def create_fts_triggers(cursor, table_name):
+    columns = ', '.join(FTS_COLUMNS[table_name])
+    new_values = ', '.join(f"new.{column}" for column in FTS_COLUMNS[table_name])
+    old_values = ', '.join(f"old.{column}" for column in FTS_COLUMNS[table_name])
+    fts = f"{table_name}_fts"
+    # Separate execute() calls rather than executescript(), which would commit the caller's transaction
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+def drop_fts_triggers(cursor, table_name):
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_fts_{suffix}")
+
+def rebuild_fts(cursor, table_name):
+    # Re-reads every row of the content table; used after creating the index or a bulk load
+    cursor.execute(f"INSERT INTO {table_name}_fts({table_name}_fts) VALUES ('rebuild')")
+
+# --- Image variant columns ---
+def ensure_image_columns(cursor, table_name):
+    # Adds any IMAGE_COLUMNS missing from databases created before they existed
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column in IMAGE_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} TEXT")
+
+# --- Catalog data version ---
+# A one-row counter bumped by triggers on every insert, update and delete in the
+# species tables. Unlike PRAGMA data_version it is stored in the file, so other
+# processes (e.g. the snapshot built by snapshot.py) can tell exactly which
+# version of the data they were made from. The counter alone doesn't identify a
+# database (a recreated or unrelated catalog can reach the same value), so it is
+# paired with a random catalog_id chosen when the table is first created.
+def create_version_table(cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS catalog_version (id INTEGER PRIMARY KEY CHECK (id = 1), catalog_id TEXT, data_version INTEGER NOT NULL)")
+    cursor.execute("PRAGMA table_info(catalog_version)")
+    if 'catalog_id' not in {row[1] for row in cursor.fetchall()}: # Tables created before catalog_id existed
+        cursor.execute("ALTER TABLE catalog_version ADD COLUMN catalog_id TEXT")
+    catalog_id = secrets.token_hex(8)
+    cursor.execute("INSERT OR IGNORE INTO catalog_version (id, catalog_id, data_version) VALUES (1, ?, 0)", (catalog_id,))
+    cursor.execute("UPDATE catalog_version SET catalog_id = ? WHERE id = 1 AND catalog_id IS NULL", (catalog_id,))
+
+def create_version_triggers(cursor, table_name):
+    for suffix, event in (('ai', 'INSERT'), ('ad', 'DELETE'), ('au', 'UPDATE')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table_name}_version_{suffix} AFTER {event} ON {table_name} BEGIN
+                UPDATE catalog_version SET data_version = data_version + 1 WHERE id = 1;
+            END
+        ''')
+
+def drop_version_triggers(cursor, table_name):
+    for suffix in ('ai', 'ad', 'au'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_version_{suffix}")
+
+def bump_data_version(cursor):
+    cursor.execute("UPDATE catalog_version SET data_version = data_version + 1 WHERE id = 1")
+
+def read_catalog_version(cursor):
+    # (catalog_id, data_version), or None for databases created before catalog_version existed
+    try:
+        cursor.execute("SELECT catalog_id, data_version FROM catalog_version WHERE id = 1")
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row and row[0] is not None else None
+
+# --- Name indexes ---
+# NOCASE indexes let the API's 'ORDER BY name COLLATE NOCASE, id' listing (and its
+# keyset pagination) walk the index instead of sorting the table into a temp B-tree.
+def create_name_indexes(cursor):
+    for table_name in SPECIES_COLUMNS:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_name_nocase ON {table_name} (name COLLATE NOCASE)")
+
+def drop_name_indexes(cursor):
+    for table_name in SPECIES_COLUMNS:
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{table_name}_name_nocase")
+
+# --- Upserts ---
+# Rows are keyed on the UNIQUE name: new names are inserted, existing ones updated in place
+# (keeping their id), so re-running a seed or import refreshes the data.
+def upsert_sql(table_name, columns=None):
+    # Only the given columns are written; on conflict the others keep their stored values
+    columns = columns or SPECIES_COLUMNS[table_name]
+    placeholders = ', '.join('?' * len(columns))
+    updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != 'name')
+    conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING" # A names-only import adds new rows
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT(name) {conflict}"
+
+def create_database(db_path=DATABASE_NAME):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # WAL lets the API's pooled read-only connections keep reading while this script writes.
+    # The setting is stored in the file, so it only needs to be applied once.
+    cursor.execute("PRAGMA journal_mode = WAL")
+
     # Create the 'fish_species' table (existing)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS fish_species (
@@ -38,12 +176,29 @@ def create_database():
         )
     ''')
 
+    for table_name in SPECIES_COLUMNS:
+        ensure_image_columns(cursor, table_name)
+    create_name_indexes(cursor)
+
+    create_version_table(cursor)
+    for table_name in SPECIES_COLUMNS:
+        create_version_triggers(cursor, table_name)
+
+    # Full-text search over names, descriptions and care details, backfilled from existing rows
+    for table_name in FTS_COLUMNS:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (f"{table_name}_fts",))
+        is_new = cursor.fetchone() is None
+        create_fts_table(cursor, table_name)
+        create_fts_triggers(cursor, table_name)
+        if is_new:
+            rebuild_fts(cursor, table_name)
+
     conn.commit()
     conn.close()
-    print(f"Database '{DATABASE_NAME}' created (if it didn't exist) and tables ensured.")
+    print(f"Database '{db_path}' created (if it didn't exist) and tables ensured.")
 
-def add_sample_fish_data(): # Renamed function for clarity
-    conn = sqlite3.connect(DATABASE_NAME)
+def add_sample_fish_data(db_path=DATABASE_NAME): # Renamed function for clarity
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     sample_fish = [
@@ -75,16 +230,13 @@ def add_sample_fish_data(): # Renamed function for clarity
             'https://example.com/neon_tetra.jpg'
         )
     ]
-    cursor.executemany('''
-        INSERT OR IGNORE INTO fish_species (name, description, habitat_temp, habitat_ph, diet, compatibility, min_tank_size_gal, plant_needs, filter_recommendation, image_url)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', sample_fish)
+    cursor.executemany(upsert_sql('fish_species'), sample_fish)
     conn.commit()
     conn.close()
-    print(f"Sample fish data added to '{DATABASE_NAME}'.")
+    print(f"Sample fish data added to '{db_path}'.")
 
-def add_sample_plant_data(): # NEW: Function to add plant data
-    conn = sqlite3.connect(DATABASE_NAME)
+def add_sample_plant_data(db_path=DATABASE_NAME): # NEW: Function to add plant data
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     sample_plants = [
@@ -107,14 +259,11 @@ def add_sample_plant_data(): # NEW: Function to add plant data
             'https://example.com/anacharis.jpg'
         )
     ]
-    cursor.executemany('''
-        INSERT OR IGNORE INTO plant_species (name, description, care_level, lighting, co2_needed, placement, growth_rate, image_url)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', sample_plants)
+    cursor.executemany(upsert_sql('plant_species'), sample_plants)
 
     conn.commit()
     conn.close()
-    print(f"Sample plant data added to '{DATABASE_NAME}'.")
+    print(f"Sample plant data added to '{db_path}'.")
 
 if __name__ == '__main__':
     create_database()
@@ -0,0 +1,122 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+logger = logging.getLogger(__name__)
+
+# --- Pooled, read-optimized SQLite connections ---
+# Connections are opened once (read-only URI mode, pragmas applied at open) and
+# handed out to requests on any thread. Because a connection outlives the request,
+# sqlite3's per-connection statement cache keeps prepared statements warm too.
+
+DEFAULT_PRAGMAS = {
+    'mmap_size': 256 * 1024 * 1024, # Map up to 256 MiB of the DB file instead of read() calls
+    'cache_size': -16000,           # Negative = KiB, so ~16 MB page cache per connection
+    'query_only': 1,                # The API never writes
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, database, size=8, pragmas=None, timeout=5.0,
+                 read_only=True, use_wal=True, cached_statements=256):
+        self.database = database
+        self.size = size
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.read_only = read_only
+        self.use_wal = use_wal
+        self.cached_statements = cached_statements
+
+        self._idle = queue.LifoQueue() # LIFO keeps the hottest connections (and page caches) in use
+        self._lock = threading.Lock()
+        self._all = []
+        self._wal_checked = False
+        self.checkouts = 0
+        self.waits = 0
+        self.opened = 0
+
+    def _ensure_wal(self):
+        # journal_mode=WAL is persistent in the file, but a read-only connection
+        # cannot switch it, so flip it once through a short-lived writable one.
+        self._wal_checked = True
+        try:
+            conn = sqlite3.connect(self.database)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Could not switch %r to WAL mode: %s", self.database, e)
+
+    def _connect(self):
+        if self.use_wal and not self._wal_checked:
+            self._ensure_wal()
+
+        if self.read_only:
+            uri = 'file:' + pathname2url(os.path.abspath(self.database)) + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.database, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row # This makes query results accessible like dictionaries
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self.opened < self.size:
+                    conn = self._connect()
+                    self._all.append(conn)
+                    self.opened += 1
+                else:
+                    self.waits += 1
+            if conn is None: # Pool exhausted, wait for another request to hand one back
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s") from None
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if any(conn is owned for owned in self._all):
+                self._idle.put(conn)
+                return
+        conn.close() # Checked out before close_all(): never hand it out again
+
+    def close_all(self):
+        # Idle connections are closed now; ones still checked out are closed when released
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._all = []
+            self.opened = 0
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'opened': self.opened,
+            'idle': self._idle.qsize(),
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+        }
@@ -0,0 +1,91 @@
+import logging
+import re
+import sqlite3
+
+from database import FTS_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# --- Ranked full-text search over both species tables ---
+# Used by /api/search when a query doesn't resolve to a species name, e.g.
+# "fish for a 10 gallon peaceful tank" or "low light plant".
+
+# Words that carry no meaning for matching species; everything else is OR-ed together
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'about', 'any', 'best', 'can', 'do', 'does', 'for', 'good', 'i',
+    'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'show', 'some', 'tell', 'that', 'the',
+    'to', 'what', 'which', 'with',
+}
+
+NAME_WEIGHT = 10.0 # A hit in the name counts ten times a hit in any other column
+DESCRIPTION_WEIGHT = 2.0
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+# A query naming exactly one of these only searches that table
+CATEGORY_WORDS = {
+    'fish_species': {'fish', 'fishes'},
+    'plant_species': {'plant', 'plants'},
+}
+
+
+def query_terms(user_query):
+    terms = []
+    for token in _TOKEN_RE.findall(user_query.lower()):
+        if token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+
+def build_match_query(terms):
+    # Quote every term so FTS5 operators (AND, NEAR, column filters) in user input stay literal
+    return ' OR '.join(f'"{term}"' for term in terms)
+
+
+def tables_for_terms(terms):
+    mentioned = [table_name for table_name, words in CATEGORY_WORDS.items() if words.intersection(terms)]
+    return mentioned if len(mentioned) == 1 else list(FTS_COLUMNS)
+
+
+def _bm25_weights(table_name):
+    weights = []
+    for column in FTS_COLUMNS[table_name]:
+        if column == 'name':
+            weights.append(NAME_WEIGHT)
+        elif column == 'description':
+            weights.append(DESCRIPTION_WEIGHT)
+        else:
+            weights.append(1.0)
+    return ', '.join(str(weight) for weight in weights)
+
+
+def search_full_text(conn, user_query, limit=5):
+    # Returns up to `limit` dicts across both tables, best match first
+    terms = query_terms(user_query)
+    if not terms:
+        return []
+    match_query = build_match_query(terms)
+
+    results = []
+    for table_name in tables_for_terms(terms):
+        fts = f"{table_name}_fts"
+        try:
+            cursor = conn.execute(f'''
+                SELECT s.id, s.name, s.description, s.image_url, bm25({fts}, {_bm25_weights(table_name)}) AS score
+                FROM {fts} JOIN {table_name} s ON s.id = {fts}.rowid
+                WHERE {fts} MATCH ?
+                ORDER BY score
+                LIMIT ?
+            ''', (match_query, limit))
+        except sqlite3.OperationalError as e: # Database predates the FTS tables; run database.py to add them
+            logger.warning("Full-text search unavailable for %s: %s", table_name, e)
+            continue
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['type'] = table_name
+            results.append(item)
+
+    # bm25() is lower-is-better
+    results.sort(key=lambda item: item['score'])
+    return results[:limit]
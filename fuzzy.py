@@ -0,0 +1,182 @@
+from collections import namedtuple
+from itertools import product
+
+from name_index import MATCH_EXACT, MATCH_SINGULAR, MATCH_SUBSTRING, MATCH_SUFFIX
+
+# --- Typo-tolerant name matching ---
+# Last resort for /api/search when a name doesn't resolve ('gupy', 'neon terta',
+# 'anubis nana'). A symmetric-deletion index (as in SymSpell) over the
+# vocabulary of words in every species name and alias finds, per misspelled
+# query word, the words within a small edit distance (a swap of adjacent letters
+# counts as one edit). The corrected phrases are then resolved by each table's
+# NameIndex, so the usual alias and substring rules still apply.
+#
+# The index maps every word prefix with up to MAX_EDITS letters removed to the
+# words it came from; a lookup generates the same variants for the query word
+# and only computes exact distances for words sharing one. That costs a few
+# dozen dict probes per word instead of a walk over a large part of a BK-tree,
+# which at 100k realistic names (a vocabulary of ~25k words) took tens of
+# milliseconds per typo. Indexing words rather than whole names keeps the
+# variant map small.
+
+FuzzyMatch = namedtuple('FuzzyMatch', ['table', 'row_id', 'phrase', 'distance'])
+
+MIN_WORD_LENGTH = 3 # Shorter words (and ones with digits) are never corrected
+MAX_EDITS = 2 # Largest edit budget max_edits() hands out
+DELETION_PREFIX_LENGTH = 8 # Only word prefixes are indexed; candidates are then checked in full
+MAX_CORRECTIONS_PER_WORD = 3
+MAX_PHRASES = 20 # Corrected phrases tried per query, fewest edits first
+CORRECTION_CACHE_SIZE = 4096 # Misspelled words whose corrections are remembered per matcher
+
+_KIND_RANK = {MATCH_EXACT: 0, MATCH_SINGULAR: 1, MATCH_SUFFIX: 2, MATCH_SUBSTRING: 3}
+
+
+def max_edits(length):
+    # Edit distance allowed for a word or phrase of this length
+    if length < MIN_WORD_LENGTH:
+        return 0
+    return 1 if length <= 4 else MAX_EDITS
+
+
+def edit_distance(a, b, limit=None):
+    # Damerau-Levenshtein distance: Levenshtein plus transpositions of adjacent
+    # letters ('terta' -> 'tetra' is one edit, the most common typo). Unlike the
+    # restricted "optimal string alignment" variant this counts a swap of two
+    # letters with others inserted between them correctly. With a limit, any
+    # distance above it may be returned as limit + 1 (the search stops early).
+    if a == b:
+        return 0
+    infinity = len(a) + len(b)
+    rows = [[infinity] * (len(b) + 2), [infinity, *range(len(b) + 1)]] # Shifted by one row and column
+    last_row = {} # letter -> last row of `a` it appeared in
+    for i, char_a in enumerate(a, 1):
+        above = rows[i]
+        row = [infinity, i]
+        last_column = 0 # Last column of `b` matching char_a in this row
+        for j, char_b in enumerate(b, 1):
+            # Comparisons instead of min(): this is the hot loop of every fuzzy lookup
+            cost = above[j]
+            if char_a == char_b:
+                last_column = j
+            else:
+                if row[j] < cost:
+                    cost = row[j]
+                if above[j + 1] < cost:
+                    cost = above[j + 1]
+                cost += 1
+                k = last_row.get(char_b)
+                if k and last_column: # Transpose, with the letters in between deleted/inserted
+                    swap = rows[k][last_column] + (i - k - 1) + 1 + (j - last_column - 1)
+                    if swap < cost:
+                        cost = swap
+            row.append(cost)
+        rows.append(row)
+        last_row[char_a] = i
+        if limit is not None and min(row) > limit: # Row minimums never decrease
+            return limit + 1
+    return rows[-1][-1]
+
+
+def deletes(word, count):
+    # `word` and every string made by removing up to `count` of its letters
+    variants = {word}
+    frontier = {word}
+    for _ in range(count):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    def __init__(self, words=(), max_distance=MAX_EDITS, prefix_length=DELETION_PREFIX_LENGTH):
+        self.max_distance = max_distance # Largest distance search() can be asked for
+        self.prefix_length = prefix_length
+        self.variants = {} # prefix with up to max_distance letters removed -> word, or list of words
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        for variant in deletes(word[:self.prefix_length], self.max_distance):
+            current = self.variants.get(variant)
+            if current is None:
+                self.variants[variant] = word # Most variants belong to one word; skip the list
+            elif isinstance(current, list):
+                current.append(word)
+            else:
+                self.variants[variant] = [current, word]
+        self.size += 1
+
+    def search(self, word, max_distance):
+        # All (distance, word) pairs within max_distance, closest first. Two words
+        # within k edits always share a string reachable by removing at most k
+        # letters from each (of their prefixes, too), so only words sharing a
+        # deletion variant are compared.
+        candidates = set()
+        for variant in deletes(word[:self.prefix_length], max_distance):
+            current = self.variants.get(variant)
+            if current is None:
+                continue
+            if isinstance(current, list):
+                candidates.update(current)
+            else:
+                candidates.add(current)
+        results = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) <= max_distance:
+                distance = edit_distance(word, candidate, max_distance)
+                if distance <= max_distance:
+                    results.append((distance, candidate))
+        results.sort()
+        return results
+
+
+class FuzzyMatcher:
+    def __init__(self, name_indexes):
+        # name_indexes: table name -> NameIndex
+        self.name_indexes = name_indexes
+        self.vocabulary = set()
+        for index in name_indexes.values():
+            for alias in index.aliases:
+                self.vocabulary.update(word for word in alias.split()
+                                       if len(word) >= MIN_WORD_LENGTH and word.isalpha())
+        self.index = DeletionIndex(sorted(self.vocabulary))
+        self._corrections = {} # misspelled word -> word options; the vocabulary never changes
+
+    def _word_options(self, word):
+        if word in self.vocabulary or not word.isalpha() or len(word) < MIN_WORD_LENGTH:
+            return [(0, word)]
+        options = self._corrections.get(word)
+        if options is None:
+            corrections = self.index.search(word, max_edits(len(word)))
+            options = corrections[:MAX_CORRECTIONS_PER_WORD] or [(0, word)] # Unknown word: keep it as typed
+            if len(self._corrections) < CORRECTION_CACHE_SIZE:
+                self._corrections[word] = options
+        return options
+
+    def phrases(self, name_lower):
+        # Corrected spellings of name_lower within its edit budget, fewest edits first
+        budget = max_edits(len(name_lower))
+        options = [self._word_options(word) for word in name_lower.split()]
+        candidates = []
+        for combination in product(*options):
+            distance = sum(edits for edits, _ in combination)
+            if 0 < distance <= budget:
+                candidates.append((distance, ' '.join(word for _, word in combination)))
+        candidates.sort()
+        return candidates[:MAX_PHRASES]
+
+    def match(self, name_lower, preferred_table=None, limit=5):
+        # Best matching rows, one per (table, row): fewest edits, then the preferred
+        # table, then the strength of the alias match (exact before substring)
+        ranked = {}
+        for distance, phrase in self.phrases(name_lower):
+            for table_name, index in self.name_indexes.items():
+                row_id, kind = index.resolve(phrase)
+                if row_id is None:
+                    continue
+                rank = (distance, table_name != preferred_table, _KIND_RANK[kind], row_id)
+                key = (table_name, row_id)
+                if key not in ranked or rank < ranked[key][0]:
+                    ranked[key] = (rank, FuzzyMatch(table_name, row_id, phrase, distance))
+        return [match for _, match in sorted(ranked.values())][:limit]
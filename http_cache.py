@@ -0,0 +1,56 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import Response, request
+
+# --- HTTP response cache ---
+# Holds pre-encoded JSON bodies for the catalog endpoints together with a
+# content-hash ETag. Entries remember the database signature they were built
+# from and are treated as misses once fish_info.db changes.
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'status', 'etag', 'signature'])
+
+
+class ResponseCache:
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, signature, body, status):
+        entry = CachedResponse(body, status, hashlib.sha1(body).hexdigest(), signature)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False) # Evict the least recently used entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def build_response(entry, cache_control):
+    response = Response(entry.body, status=entry.status, mimetype='application/json')
+    if entry.status == 200:
+        response.set_etag(entry.etag)
+        response.headers['Cache-Control'] = cache_control
+        # Answers If-None-Match with an empty 304 when the client's copy is current
+        response.make_conditional(request)
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
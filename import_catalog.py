@@ -0,0 +1,164 @@
+import argparse
+import csv
+import json
+import sqlite3
+import time
+from itertools import groupby, islice
+
+from database import (DATABASE_NAME, FTS_COLUMNS, SPECIES_COLUMNS, bump_data_version, create_database,
+                      create_fts_triggers, create_name_indexes, create_version_triggers, drop_fts_triggers,
+                      drop_name_indexes, drop_version_triggers, rebuild_fts, upsert_sql)
+
+# --- Bulk catalog importer ---
+# Streams species rows from a CSV or NDJSON export into fish_info.db:
+#
+#   python import_catalog.py fish fish_export.csv
+#   python import_catalog.py plant plants.ndjson --chunk-size 50000
+#
+# Input columns/keys are matched by name against the table's columns (see
+# database.SPECIES_COLUMNS); unknown ones are ignored and 'name' is required.
+# Rows are upserted on name, so re-importing an export updates rows in place.
+# Only the columns present in the input (the CSV header, or each NDJSON
+# object's keys) are written: a partial export leaves the other columns of
+# existing rows untouched, while an empty CSV cell or a JSON null clears one.
+#
+# For speed the load runs with synchronous=OFF and an in-memory journal, in
+# chunked transactions, with the NOCASE name index, the FTS sync triggers and
+# the catalog_version triggers dropped. They are restored once at the end
+# (with a single data_version bump) instead of firing per row.
+
+TABLES = {'fish': 'fish_species', 'plant': 'plant_species'}
+INTEGER_COLUMNS = {'min_tank_size_gal'}
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def iter_records(path, file_format):
+    # Yields one dict per input row without reading the whole file
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({e})") from None
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object, got {type(record).__name__}")
+                yield record
+
+
+def iter_rows(records, table_name, skipped):
+    # Turns input dicts into (columns, parameter list) pairs, with the columns present
+    # in the record in SPECIES_COLUMNS order ('name' first). This runs once per input
+    # row, so it sticks to comprehensions and avoids per-value calls.
+    table_columns = SPECIES_COLUMNS[table_name]
+    layouts = {} # present columns -> positions of integer columns
+    for record in records:
+        columns = tuple(column for column in table_columns if column in record)
+        integer_positions = layouts.get(columns)
+        if integer_positions is None:
+            integer_positions = layouts[columns] = [position for position, column in enumerate(columns)
+                                                    if column in INTEGER_COLUMNS]
+        if not columns or columns[0] != 'name': # A row without a name can't be upserted
+            skipped[0] += 1
+            continue
+        values = [record[column] for column in columns]
+        if '' in values: # Empty CSV cells are stored as NULL
+            values = [None if value == '' else value for value in values]
+        for position in integer_positions:
+            if values[position] is not None:
+                try:
+                    values[position] = int(values[position])
+                except (TypeError, ValueError):
+                    values[position] = None
+        name = values[0]
+        if isinstance(name, str):
+            name = values[0] = name.strip()
+        if not name: # A row without a name can't be upserted
+            skipped[0] += 1
+            continue
+        yield columns, values
+
+
+def _set_journal_mode(conn, mode):
+    try:
+        conn.execute(f"PRAGMA journal_mode = {mode}")
+    except sqlite3.OperationalError as e: # e.g. the API still holds the database open
+        print(f"WARNING: Could not switch journal_mode to {mode}: {e}")
+
+
+def import_catalog(db_path, table_name, records, chunk_size=DEFAULT_CHUNK_SIZE):
+    create_database(db_path) # Make sure tables, indexes and FTS exist before loading
+
+    conn = sqlite3.connect(db_path, isolation_level=None) # Transactions are managed explicitly
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    _set_journal_mode(conn, 'MEMORY')
+    cursor.execute("PRAGMA cache_size = -200000") # ~200 MB while loading
+
+    statements = {} # present columns -> upsert SQL writing just those columns
+    skipped = [0]
+    rows = iter_rows(records, table_name, skipped)
+    total = 0
+    started = time.perf_counter()
+    try:
+        cursor.execute("BEGIN")
+        drop_name_indexes(cursor)
+        drop_version_triggers(cursor, table_name)
+        if table_name in FTS_COLUMNS:
+            drop_fts_triggers(cursor, table_name)
+        cursor.execute("COMMIT")
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            cursor.execute("BEGIN")
+            for columns, group in groupby(chunk, key=lambda row: row[0]): # Runs of rows with the same columns
+                sql = statements.get(columns)
+                if sql is None:
+                    sql = statements[columns] = upsert_sql(table_name, list(columns))
+                cursor.executemany(sql, (values for _, values in group))
+            cursor.execute("COMMIT")
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"  {total} rows ({total / elapsed:,.0f} rows/sec)")
+        load_seconds = time.perf_counter() - started
+    finally:
+        # Restore the deferred index and FTS state even if the load failed halfway
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        cursor.execute("BEGIN")
+        create_name_indexes(cursor)
+        create_version_triggers(cursor, table_name)
+        bump_data_version(cursor)
+        if table_name in FTS_COLUMNS:
+            create_fts_triggers(cursor, table_name)
+            rebuild_fts(cursor, table_name)
+        cursor.execute("COMMIT")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        _set_journal_mode(conn, 'WAL')
+        conn.close()
+
+    total_seconds = time.perf_counter() - started
+    print(f"Imported {total} rows into {table_name} in {total_seconds:.2f}s "
+          f"({total / load_seconds if load_seconds else 0:,.0f} rows/sec loading, "
+          f"{total_seconds - load_seconds:.2f}s rebuilding indexes); skipped {skipped[0]} rows without a name.")
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bulk-load species from a CSV or NDJSON export.")
+    parser.add_argument('type', choices=sorted(TABLES), help="Which table to load")
+    parser.add_argument('path', help="CSV file with a header row, or NDJSON (one JSON object per line)")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension")
+    parser.add_argument('--db', default=DATABASE_NAME, help=f"Database file (default: {DATABASE_NAME})")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per transaction")
+    args = parser.parse_args()
+
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    import_catalog(args.db, TABLES[args.type], iter_records(args.path, file_format), args.chunk_size)
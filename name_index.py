@@ -0,0 +1,129 @@
+import re
+
+# --- In-memory species name index ---
+# Resolves a lowercased search name to a row id with the same precedence as the
+# old SQL fallback chain in app.fetch_data_from_table:
+#   1. exact LOWER(name) match
+#   2. singular form ('guppies' -> 'guppy', 'bettas' -> 'betta')
+#   3. category suffix appended ('betta' -> 'betta fish', 'java' -> 'java plant')
+#   4. substring match (the old LIKE '%x%'), first row in rowid order
+# Attempts 1-3 are folded into one alias dictionary at build time, attempt 4 is
+# answered from a trigram posting list instead of a full table scan.
+
+CATEGORY_SUFFIXES = {
+    'fish_species': ' fish',
+    'plant_species': ' plant',
+}
+
+MATCH_EXACT = 'exact'
+MATCH_SINGULAR = 'singular'
+MATCH_SUFFIX = 'suffix'
+MATCH_SUBSTRING = 'substring'
+
+# Lower priority number wins, mirroring the order of the old SQL attempts
+_PRIORITY = {MATCH_EXACT: 0, MATCH_SINGULAR: 1, MATCH_SUFFIX: 2}
+
+# SQLite's LOWER() only folds ASCII letters (without ICU), so keys are built the same way
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def sql_lower(text):
+    return text.translate(_ASCII_LOWER)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _like_to_regex(pattern):
+    # Translate a LIKE '%x%' body into a regex; '%' and '_' keep their SQL meaning
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+class NameIndex:
+    def __init__(self, table_name, rows):
+        # rows: iterable of (id, name) pairs, in any order
+        self.table_name = table_name
+        self.aliases = {}   # alias -> (priority, row id, match kind)
+        self.keys = {}      # row id -> lowercased name
+        self.trigrams = {}  # trigram -> list of row ids, ascending
+        suffix = CATEGORY_SUFFIXES.get(table_name)
+
+        for row_id, name in sorted((row[0], row[1]) for row in rows):
+            key = sql_lower(name)
+            self.keys[row_id] = key
+            self._add_alias(key, row_id, MATCH_EXACT)
+
+            # Queries whose singular candidate is this key
+            if key.endswith('y'):
+                self._add_alias(key[:-1] + 'ies', row_id, MATCH_SINGULAR)
+            if not key.endswith('ie'): # 'xies' would be singularized to 'xy', not 'xie'
+                self._add_alias(key + 's', row_id, MATCH_SINGULAR)
+
+            # Queries that only match once the category suffix is appended
+            if suffix and key.endswith(suffix):
+                bare = key[:-len(suffix)]
+                if suffix not in bare:
+                    self._add_alias(bare, row_id, MATCH_SUFFIX)
+
+            for gram in _trigrams(key):
+                self.trigrams.setdefault(gram, []).append(row_id)
+
+    def _add_alias(self, alias, row_id, kind):
+        entry = (_PRIORITY[kind], row_id, kind)
+        current = self.aliases.get(alias)
+        if current is None or entry < current:
+            self.aliases[alias] = entry
+
+    def __len__(self):
+        return len(self.keys)
+
+    def resolve(self, search_name_lower):
+        # Returns (row id, match kind) or (None, None)
+        entry = self.aliases.get(search_name_lower)
+        if entry:
+            return entry[1], entry[2]
+
+        row_id = self._substring(search_name_lower)
+        if row_id is not None:
+            return row_id, MATCH_SUBSTRING
+        return None, None
+
+    def _substring(self, text):
+        if '%' in text or '_' in text:
+            pattern = _like_to_regex(text)
+            for row_id, key in self.keys.items():
+                if pattern.search(key):
+                    return row_id
+            return None
+
+        if len(text) < 3: # Too short for a trigram probe, scan keys in rowid order
+            for row_id, key in self.keys.items():
+                if text in key:
+                    return row_id
+            return None
+
+        postings = []
+        for gram in _trigrams(text):
+            ids = self.trigrams.get(gram)
+            if not ids:
+                return None
+            postings.append(ids)
+        # Walk the rarest trigram's ids in rowid order and verify the full substring
+        for row_id in min(postings, key=len):
+            if text in self.keys[row_id]:
+                return row_id
+        return None
+
+
+def build_name_index(conn, table_name):
+    cursor = conn.execute(f"SELECT id, name FROM {table_name} ORDER BY id")
+    return NameIndex(table_name, cursor.fetchall())
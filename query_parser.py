@@ -0,0 +1,97 @@
+import re
+import string
+from collections import namedtuple
+
+# --- Search query parser ---
+# The keyword tables and regexes used by /api/search, compiled once at import.
+# parse_query() turns a cleaned, lowercased query into a QueryIntent.
+
+QueryIntent = namedtuple('QueryIntent', ['item_name', 'table', 'requested_detail'])
+
+# Detail requests, in priority order: the first detail (and within it the first
+# keyword) that appears anywhere in the query wins.
+DETAIL_KEYWORDS = {
+    'diet': ['diet', 'eat', 'food'],
+    'habitat': ['habitat', 'water', 'temperature', 'ph'],
+    'compatibility': ['compatible', 'compatibility', 'other fish'],
+    'min_tank_size_gal': ['tank size', 'size of tank'],
+    'plant_needs': ['plants', 'plantation'], # For fish needs
+    'filter_recommendation': ['filter', 'filtering'],
+    'care_level': ['care level', 'care'], # For plants
+    'lighting': ['lighting'],
+    'co2_needed': ['co2'],
+    'placement': ['placement'],
+    'growth_rate': ['growth rate', 'growth']
+}
+
+PLANT_HINTS = ["plant", "fern", "anubias", "anacharis"]
+FISH_HINTS = ["fish", "betta", "guppy", "tetra"]
+
+# Flattened (detail, keyword) pairs; the list position is the keyword's priority
+_DETAIL_PRIORITY = [(detail, keyword) for detail, keywords in DETAIL_KEYWORDS.items() for keyword in keywords]
+_KEYWORD_RANK = {keyword: rank for rank, (_, keyword) in enumerate(_DETAIL_PRIORITY)}
+
+# A zero-width lookahead reports a match at every position (so overlapping keywords
+# are not skipped), and alternatives are listed by priority so the one reported at
+# a position is the highest-priority keyword starting there.
+_DETAIL_RE = re.compile('(?=(' + '|'.join(re.escape(keyword) for _, keyword in _DETAIL_PRIORITY) + '))')
+_PLANT_RE = re.compile('|'.join(re.escape(hint) for hint in PLANT_HINTS))
+_FISH_RE = re.compile('|'.join(re.escape(hint) for hint in FISH_HINTS))
+
+# Try to extract the item name using regex. These capture text that is likely
+# the name, before certain keywords or end of string.
+_NAME_PATTERNS = [
+    re.compile(r'(?:about|for|what is|tell me about|show me)\s+([\w\s]+?)(?:\s+(?:fish|plant)|\?|\.|$)'), # "tell me about Betta Fish"
+    re.compile(r'([\w\s]+?)(?:\s+(?:fish|plant)|\?|\.|$)'), # "Betta Fish" or "Java Fern" followed by category/punctuation
+    re.compile(r'([\w\s]+)') # Fallback: capture any remaining words as a name candidate
+]
+
+
+def normalize_query(user_query):
+    # Remove trailing punctuation and standardize spaces
+    user_query = user_query.lower().rstrip(string.punctuation).strip()
+    return ' '.join(user_query.split())
+
+
+def _find_detail(user_query):
+    best_rank = None
+    for match in _DETAIL_RE.finditer(user_query):
+        rank = _KEYWORD_RANK[match.group(1)]
+        if best_rank is None or rank < best_rank:
+            best_rank = rank
+            if rank == 0:
+                break
+    if best_rank is None:
+        return None, None
+    return _DETAIL_PRIORITY[best_rank]
+
+
+def parse_query(user_query):
+    # user_query must already be passed through normalize_query()
+    requested_detail, keyword = _find_detail(user_query)
+
+    cleaned_query_for_name = user_query
+    if keyword:
+        cleaned_query_for_name = cleaned_query_for_name.replace(keyword, '').strip()
+    cleaned_query_for_name = ' '.join(cleaned_query_for_name.split()) # Re-clean spaces
+
+    detected_item_name = None
+    for pattern in _NAME_PATTERNS:
+        match = pattern.search(cleaned_query_for_name)
+        if match:
+            detected_item_name = match.group(1).strip()
+            break # Found a name, stop trying other patterns
+
+    target_table = None
+    if detected_item_name:
+        detected_item_name = detected_item_name.rstrip(string.punctuation).strip() # Clean again
+        detected_item_name = ' '.join([word.capitalize() for word in detected_item_name.split()]) # Capitalize fully
+
+        is_plant_explicit = _PLANT_RE.search(user_query) is not None
+        is_fish_explicit = _FISH_RE.search(user_query) is not None
+        if is_plant_explicit and not is_fish_explicit: # Explicitly plant, not fish
+            target_table = 'plant_species'
+        else: # Explicitly fish, or neither/both - prioritize fish by default
+            target_table = 'fish_species'
+
+    return QueryIntent(detected_item_name, target_table, requested_detail)
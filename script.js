@@ -9,6 +9,30 @@ document.addEventListener('DOMContentLoaded', () => {
     const closeSearchResultsButton = document.getElementById('close-search-results');
     const resultsDisplay = document.getElementById('results-display'); // Inside the overlay
 
+    // --- Responsive images ---
+    // Variant URLs written by build_images.py are paths on the API server ('/images/build/...'),
+    // which serves them with immutable caching. <picture> lets the browser pick AVIF/WebP and the
+    // smallest width that fits; rows without variants fall back to plain image_url.
+    const LIST_IMAGE_SIZES = '(max-width: 768px) 100vw, 300px';
+    const DETAIL_IMAGE_SIZES = '(max-width: 768px) 100vw, 350px';
+
+    function assetUrl(path) {
+        return path && path.startsWith('/') ? `${API_BASE_URL}${path}` : path;
+    }
+
+    function srcsetUrls(srcset) {
+        return srcset.split(',').map(candidate => assetUrl(candidate.trim())).join(', ');
+    }
+
+    function pictureHtml(item, src, sizes, fallback, loading = 'lazy') {
+        if (!src) return fallback;
+        let sources = '';
+        if (item.image_avif_srcset) sources += `<source type="image/avif" srcset="${srcsetUrls(item.image_avif_srcset)}" sizes="${sizes}">`;
+        if (item.image_webp_srcset) sources += `<source type="image/webp" srcset="${srcsetUrls(item.image_webp_srcset)}" sizes="${sizes}">`;
+        const srcset = item.image_srcset ? ` srcset="${srcsetUrls(item.image_srcset)}" sizes="${sizes}"` : '';
+        return `<picture>${sources}<img src="${assetUrl(src)}"${srcset} alt="${item.name}" loading="${loading}" decoding="async"></picture>`;
+    }
+
     // Function to show/hide the search overlay
     function toggleSearchOverlay(show) {
         if (show) {
@@ -26,6 +50,17 @@ document.addEventListener('DOMContentLoaded', () => {
 
         if (data.type === 'error') {
             resultsDisplay.innerHTML = `<p class="error-message">${data.message}</p>`;
+        } else if (data.type === 'search_results') { // No exact species, ranked full-text matches instead
+            let htmlContent = `<p class="placeholder-text-search">${data.message}</p>`;
+            data.results.forEach(item => {
+                const detailPage = item.type === 'plant_species' ? 'plant_detail.html' : 'fish_detail.html';
+                htmlContent += `<div class="search-result-card">`;
+                htmlContent += `<h3>${item.name}</h3>`;
+                htmlContent += `<p>${item.description.substring(0, 150)}...</p>`;
+                htmlContent += `<p><a href="${detailPage}?name=${encodeURIComponent(item.name)}" class="view-details-link">View Full Details &rarr;</a></p>`;
+                htmlContent += `</div>`;
+            });
+            resultsDisplay.innerHTML = htmlContent;
         } else if (data.data) { // Item found
             const item = data.data;
             let htmlContent = `<div class="search-result-card">`;
@@ -45,6 +80,14 @@ document.addEventListener('DOMContentLoaded', () => {
         } else { // Generic message if no specific data but not an error type
             resultsDisplay.innerHTML = `<p class="placeholder-text-search">${data.message}</p>`;
         }
+
+        if (data.corrected_from && data.data) { // The API fixed a misspelled name
+            resultsDisplay.insertAdjacentHTML('afterbegin', `<p class="placeholder-text-search">Showing results for <strong>${data.data.name}</strong> instead of "${data.corrected_from}".</p>`);
+        }
+        if (data.suggestions && data.suggestions.length) { // Several close spellings, let the user pick
+            const links = data.suggestions.map(suggestion => `<a href="#" class="view-details-link" data-suggestion="${suggestion.name}">${suggestion.name}</a>`);
+            resultsDisplay.insertAdjacentHTML('beforeend', `<p class="placeholder-text-search">Did you mean: ${links.join(', ')}?</p>`);
+        }
     }
 
     // Function to handle search (used by all pages)
@@ -80,15 +123,66 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // --- Typeahead: name completions from /api/suggest while typing ---
+    // Requests are debounced and a newer keystroke aborts the previous request, so typing
+    // fast costs one cheap lookup instead of a search per key.
+    const SUGGEST_DEBOUNCE_MS = 150;
+    let suggestTimer = null;
+    let suggestController = null;
+
+    function setupTypeahead() {
+        const suggestionList = document.createElement('datalist'); // Native dropdown under the search box
+        suggestionList.id = 'search-suggestions';
+        searchInput.insertAdjacentElement('afterend', suggestionList);
+        searchInput.setAttribute('list', suggestionList.id);
+        searchInput.setAttribute('autocomplete', 'off');
+
+        searchInput.addEventListener('input', () => {
+            clearTimeout(suggestTimer);
+            const query = searchInput.value.trim();
+            if (query.length < 2) {
+                suggestionList.innerHTML = '';
+                return;
+            }
+            suggestTimer = setTimeout(async () => {
+                if (suggestController) suggestController.abort();
+                suggestController = new AbortController();
+                try {
+                    const response = await fetch(`${API_BASE_URL}/api/suggest?q=${encodeURIComponent(query)}`, { signal: suggestController.signal });
+                    if (!response.ok) return;
+                    const data = await response.json();
+                    suggestionList.innerHTML = '';
+                    data.suggestions.forEach(suggestion => {
+                        const option = document.createElement('option');
+                        option.value = suggestion.name;
+                        suggestionList.appendChild(option);
+                    });
+                } catch (error) {
+                    if (error.name !== 'AbortError') console.error('Error fetching suggestions:', error);
+                }
+            }, SUGGEST_DEBOUNCE_MS);
+        });
+    }
+
     // --- Event Listeners for Search Bar (common to all pages) ---
     if (searchButton && searchInput && searchResultsOverlay && closeSearchResultsButton) {
         searchButton.addEventListener('click', performSearch);
+        setupTypeahead();
         searchInput.addEventListener('keypress', (event) => {
             if (event.key === 'Enter') {
                 performSearch();
             }
         });
         closeSearchResultsButton.addEventListener('click', () => toggleSearchOverlay(false));
+        // Clicking a "Did you mean" suggestion searches for it
+        resultsDisplay.addEventListener('click', (event) => {
+            const suggestion = event.target.closest('[data-suggestion]');
+            if (suggestion) {
+                event.preventDefault();
+                searchInput.value = suggestion.dataset.suggestion;
+                performSearch();
+            }
+        });
         // Close overlay if clicked outside content (optional)
         searchResultsOverlay.addEventListener('click', (event) => {
             if (event.target === searchResultsOverlay) {
@@ -126,7 +220,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 card.href = `fish_detail.html?name=${encodeURIComponent(fish.name)}`; // Link to detail page
                 card.classList.add('list-card');
                 card.innerHTML = `
-                    <div class="list-card-image">${fish.image_url ? `<img src="${fish.image_url}" alt="${fish.name}">` : '🐠'}</div>
+                    <div class="list-card-image">${pictureHtml(fish, fish.image_thumb_url || fish.image_url, LIST_IMAGE_SIZES, '🐠')}</div>
                     <h3>${fish.name}</h3>
                     <p>${fish.description.substring(0, 100)}...</p>
                 `;
@@ -170,7 +264,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             fishDetailCard.innerHTML = `
                 <div class="detail-image-container">
-                    ${fish.image_url ? `<img src="${fish.image_url}" alt="${fish.name}">` : '🐠'}
+                    ${pictureHtml(fish, fish.image_detail_url || fish.image_url, DETAIL_IMAGE_SIZES, '🐠', 'eager')}
                 </div>
                 <div class="detail-info">
                     <h2>${fish.name}</h2>
@@ -216,7 +310,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 card.href = `plant_detail.html?name=${encodeURIComponent(plant.name)}`; // Link to detail page
                 card.classList.add('list-card');
                 card.innerHTML = `
-                    <div class="list-card-image">${plant.image_url ? `<img src="${plant.image_url}" alt="${plant.name}">` : '🌿'}</div>
+                    <div class="list-card-image">${pictureHtml(plant, plant.image_thumb_url || plant.image_url, LIST_IMAGE_SIZES, '🌿')}</div>
                     <h3>${plant.name}</h3>
                     <p>${plant.description.substring(0, 100)}...</p>
                 `;
@@ -260,7 +354,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             plantDetailCard.innerHTML = `
                 <div class="detail-image-container">
-                    ${plant.image_url ? `<img src="${plant.image_url}" alt="${plant.name}">` : '🌿'}
+                    ${pictureHtml(plant, plant.image_detail_url || plant.image_url, DETAIL_IMAGE_SIZES, '🌿', 'eager')}
                 </div>
                 <div class="detail-info">
                     <h2>${plant.name}</h2>
@@ -0,0 +1,47 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+# --- Production launcher ---
+# `python app.py` starts Flask's single-process debug server, which is only meant
+# for local development. For anything else run the API through this launcher:
+#
+#   python serve.py                      # ASGI: uvicorn + asgi_app.py, one worker per CPU
+#   python serve.py --mode wsgi          # WSGI: gunicorn + app.py with threaded workers
+#   python serve.py --workers 8 --port 8000 --host 0.0.0.0
+#
+# Each worker is a separate process with its own SQLite connection pool, name
+# indexes and caches (see app.py); fish_info.db is opened read-only, so any
+# number of workers can share it. Requires `pip install uvicorn` (ASGI) or
+# `pip install gunicorn` (WSGI, Unix only).
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def build_command(mode, host, port, workers, threads):
+    if mode == 'asgi':
+        return [sys.executable, '-m', 'uvicorn', 'asgi_app:application',
+                '--host', host, '--port', str(port), '--workers', str(workers),
+                '--no-access-log']
+    return [sys.executable, '-m', 'gunicorn', 'app:app',
+            '--bind', f"{host}:{port}", '--workers', str(workers), '--threads', str(threads)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the Aquarium Info Hub API with multiple workers.")
+    parser.add_argument('--mode', choices=['asgi', 'wsgi'], default='asgi')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000, help="script.js expects 5000 by default")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=8, help="Threads per worker in WSGI mode")
+    args = parser.parse_args()
+
+    server = 'uvicorn' if args.mode == 'asgi' else 'gunicorn'
+    if importlib.util.find_spec(server) is None:
+        sys.exit(f"{server} is not installed; run `pip install {server}` first.")
+
+    command = build_command(args.mode, args.host, args.port, args.workers, args.threads)
+    print(f"Starting {server} with {args.workers} workers on http://{args.host}:{args.port}")
+    os.chdir(os.path.dirname(os.path.abspath(__file__))) # fish_info.db is resolved relative to the app
+    os.execv(sys.executable, command) # Replace this process so signals reach the server directly
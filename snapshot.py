@@ -0,0 +1,254 @@
+import argparse
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import time
+from array import array
+from bisect import bisect_left
+
+from database import DATABASE_NAME, SPECIES_COLUMNS, read_catalog_version
+from name_index import MATCH_EXACT, MATCH_SINGULAR, MATCH_SUFFIX, NameIndex
+
+# --- Catalog snapshot ---
+# A read-only binary image of the catalog for fast worker start-up:
+#
+#   python snapshot.py                    # fish_info.db -> fish_info.db.snapshot
+#   python snapshot.py --db other.db --output other.snapshot
+#
+# For each species table the file holds every row as ready-to-send JSON, the
+# NameIndex aliases (exact, singular and " fish"/" plant" suffix keys) as a
+# sorted array, and the body of the default list endpoint. The API maps the
+# file with mmap, so nothing is parsed at start-up, the pages are shared by all
+# worker processes through the OS page cache, and each lookup only touches the
+# bytes it needs (binary search over the aliases, one slice for the row).
+#
+# The header records the catalog_version (catalog_id and data_version) of the
+# database it was built from (see database.py); the API only uses a snapshot
+# whose catalog_id and data_version both match the live database and falls
+# back to SQLite otherwise. Rebuild it
+# after every catalog change (seeding, imports, build_images.py).
+#
+# Layout: MAGIC, u32 format version, u32 header length, JSON header, then
+# 8-byte aligned sections whose [offset, length] pairs are listed in the header.
+
+MAGIC = b'AQSNAP\x00\x00'
+FORMAT_VERSION = 2 # 2: header records catalog_id
+_PREAMBLE = struct.Struct('<8sII')
+
+# Fields of the precomputed list body; must match app.LIST_DEFAULT_FIELDS or the
+# API ignores the precomputed list (the header records the fields used)
+LIST_FIELDS = ['id', 'name', 'description', 'image_url', 'image_thumb_url', 'image_srcset',
+               'image_webp_srcset', 'image_avif_srcset']
+
+ALIAS_KINDS = [MATCH_EXACT, MATCH_SINGULAR, MATCH_SUFFIX] # Stored as one byte: the list position
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def default_snapshot_path(db_path):
+    return db_path + '.snapshot'
+
+
+def dump_json(value):
+    # Same bytes as the API's jsonify() outside debug mode (sorted keys, compact, ASCII,
+    # trailing newline); the API doesn't use the snapshot when jsonify() pretty-prints
+    return (json.dumps(value, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode('ascii')
+
+
+# --- Writing ---
+class _SectionWriter:
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, data):
+        padding = -self.size % 8 # Keep every section 8-byte aligned for memoryview.cast()
+        if padding:
+            self.chunks.append(b'\x00' * padding)
+            self.size += padding
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return [offset, len(data)]
+
+
+def _table_sections(conn, table_name, sections):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table_name} ORDER BY id")
+    columns = [column[0] for column in cursor.description]
+    ids = array('q')
+    row_offsets = array('Q', [0])
+    row_data = bytearray()
+    names = []
+    for row in cursor:
+        data = dict(zip(columns, row))
+        ids.append(data['id'])
+        names.append((data['id'], data['name']))
+        row_data += dump_json(data)
+        row_offsets.append(len(row_data))
+
+    # Aliases sorted by their UTF-8 bytes, which is the order the reader's binary search uses
+    index = NameIndex(table_name, names)
+    aliases = sorted((alias.encode('utf-8'), entry[1], ALIAS_KINDS.index(entry[2]))
+                     for alias, entry in index.aliases.items())
+    alias_offsets = array('Q', [0])
+    alias_data = bytearray()
+    for key, _, _ in aliases:
+        alias_data += key
+        alias_offsets.append(len(alias_data))
+
+    cursor.execute(f"SELECT {', '.join(LIST_FIELDS)} FROM {table_name} ORDER BY name COLLATE NOCASE, id")
+    list_body = dump_json([dict(zip(LIST_FIELDS, row)) for row in cursor])
+
+    return {
+        'columns': columns,
+        'rows': len(ids),
+        'ids': sections.add(ids.tobytes()),
+        'row_offsets': sections.add(row_offsets.tobytes()),
+        'row_data': sections.add(bytes(row_data)),
+        'alias_offsets': sections.add(alias_offsets.tobytes()),
+        'alias_data': sections.add(bytes(alias_data)),
+        'alias_rows': sections.add(array('q', [alias[1] for alias in aliases]).tobytes()),
+        'alias_kinds': sections.add(bytes(alias[2] for alias in aliases)),
+        'list_json': sections.add(list_body),
+    }
+
+
+def write_snapshot(db_path=DATABASE_NAME, snapshot_path=None):
+    snapshot_path = snapshot_path or default_snapshot_path(db_path)
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN") # One read transaction, so the rows match the recorded data_version
+        catalog_version = read_catalog_version(conn.cursor())
+        if catalog_version is None:
+            raise SnapshotError(f"'{db_path}' has no catalog_version table; run database.py first.")
+        sections = _SectionWriter()
+        tables = {table_name: _table_sections(conn, table_name, sections) for table_name in SPECIES_COLUMNS}
+        conn.rollback()
+    finally:
+        conn.close()
+
+    catalog_id, data_version = catalog_version
+    header = json.dumps({'catalog_id': catalog_id, 'data_version': data_version, 'created': time.time(), 'list_fields': LIST_FIELDS,
+                         'tables': tables}).encode('utf-8')
+    data_start = _PREAMBLE.size + len(header)
+    data_start += -data_start % 8
+    temp_path = snapshot_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\x00' * (data_start - _PREAMBLE.size - len(header)))
+        for chunk in sections.chunks:
+            f.write(chunk)
+    os.replace(temp_path, snapshot_path) # Workers that already mapped the old file keep their copy
+
+    rows = sum(table['rows'] for table in tables.values())
+    print(f"Wrote '{snapshot_path}' ({(data_start + sections.size) / 1024:,.0f} KiB, {rows} rows, "
+          f"data_version {data_version}) in {time.perf_counter() - started:.2f}s.")
+    return snapshot_path
+
+
+# --- Reading ---
+class SnapshotTable:
+    def __init__(self, view, meta, data_start):
+        self.columns = meta['columns']
+        self.rows = meta['rows']
+        self._views = []
+
+        def section(name, cast=None):
+            offset, length = meta[name]
+            part = view[data_start + offset:data_start + offset + length]
+            if cast:
+                part = part.cast(cast)
+            self._views.append(part)
+            return part
+
+        self._ids = section('ids', 'q')
+        self._row_offsets = section('row_offsets', 'Q')
+        self._row_data = section('row_data')
+        self._alias_offsets = section('alias_offsets', 'Q')
+        self._alias_data = section('alias_data')
+        self._alias_rows = section('alias_rows', 'q')
+        self._alias_kinds = section('alias_kinds')
+        self._list_json = section('list_json')
+
+    def _alias_key(self, position):
+        return self._alias_data[self._alias_offsets[position]:self._alias_offsets[position + 1]]
+
+    def resolve_alias(self, search_name_lower):
+        # NameIndex.resolve() without the substring fallback: (row id, match kind) or (None, None)
+        key = search_name_lower.encode('utf-8')
+        low, high = 0, len(self._alias_rows)
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self._alias_key(middle)) < key: # memoryviews only support ==
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._alias_rows) and self._alias_key(low) == key:
+            return self._alias_rows[low], ALIAS_KINDS[self._alias_kinds[low]]
+        return None, None
+
+    def row_json(self, row_id):
+        # The row as the API's JSON body (bytes), or None
+        position = bisect_left(self._ids, row_id)
+        if position == len(self._ids) or self._ids[position] != row_id:
+            return None
+        return bytes(self._row_data[self._row_offsets[position]:self._row_offsets[position + 1]])
+
+    def list_json(self):
+        return bytes(self._list_json)
+
+    def release(self):
+        for part in self._views:
+            part.release()
+        self._views = []
+
+
+class CatalogSnapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # Empty file
+                raise SnapshotError(f"'{path}' is empty.") from None
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != MAGIC:
+                raise SnapshotError(f"'{path}' is not a catalog snapshot.")
+            if version != FORMAT_VERSION:
+                raise SnapshotError(f"'{path}' has format version {version}, expected {FORMAT_VERSION}.")
+            header_end = _PREAMBLE.size + header_length
+            header = json.loads(self._mmap[_PREAMBLE.size:header_end])
+        except (struct.error, ValueError) as e:
+            self._mmap.close()
+            raise SnapshotError(f"'{path}' is corrupt: {e}") from None
+
+        self.catalog_id = header['catalog_id']
+        self.data_version = header['data_version']
+        self.created = header['created']
+        self.list_fields = header['list_fields']
+        self._view = memoryview(self._mmap)
+        data_start = header_end + (-header_end % 8)
+        self.tables = {table_name: SnapshotTable(self._view, meta, data_start)
+                       for table_name, meta in header['tables'].items()}
+
+    def close(self):
+        for table in self.tables.values():
+            table.release()
+        self._view.release()
+        self._mmap.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the mmap-able catalog snapshot used by the API.")
+    parser.add_argument('--db', default=DATABASE_NAME, help=f"Source database (default: {DATABASE_NAME})")
+    parser.add_argument('--output', help="Snapshot file (default: <db>.snapshot)")
+    args = parser.parse_args()
+    write_snapshot(args.db, args.output)
@@ -0,0 +1,95 @@
+import threading
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+# --- Typeahead suggestions ---
+# A sorted array of lowercased name keys searched with bisect, so completing a
+# prefix costs a binary search plus a short scan. Every name is indexed from
+# each of its word starts as well ('tetra' completes to 'Neon Tetra').
+# Candidates are ranked by how often a species was the answer to /api/search
+# (SearchPopularity), then whole-name matches before word matches, then
+# shorter names first.
+
+Suggestion = namedtuple('Suggestion', ['name', 'table'])
+
+SCAN_LIMIT = 200 # Index entries examined per prefix; short prefixes can match thousands
+POPULAR_SCAN_LIMIT = 100 # Most searched names also checked, in case they fall outside the scan
+
+
+class SearchPopularity:
+    def __init__(self):
+        self._counts = Counter() # (table, name) -> searches answered with that species
+        self._lock = threading.Lock()
+
+    def record(self, table_name, name):
+        with self._lock:
+            self._counts[(table_name, name)] += 1
+
+    def count(self, table_name, name):
+        return self._counts.get((table_name, name), 0)
+
+    def most_common(self, n):
+        with self._lock:
+            return self._counts.most_common(n)
+
+
+class PrefixIndex:
+    def __init__(self, rows_by_table):
+        # rows_by_table: table name -> iterable of species names
+        self.names = []     # position -> Suggestion
+        self.positions = {} # Suggestion -> position
+        entries = []        # (key, position, word index)
+        for table_name, names in rows_by_table.items():
+            for name in names:
+                position = len(self.names)
+                suggestion = Suggestion(name, table_name)
+                self.names.append(suggestion)
+                self.positions[suggestion] = position
+                words = name.lower().split()
+                for word_index in range(len(words)):
+                    entries.append((' '.join(words[word_index:]), position, word_index))
+        entries.sort()
+        self.keys = [entry[0] for entry in entries]
+        self.entries = [(entry[1], entry[2]) for entry in entries]
+
+    def __len__(self):
+        return len(self.names)
+
+    def complete(self, prefix, limit, popularity=None):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        candidates = {} # position -> 0 for whole-name prefix matches, 1 for word matches
+        start = bisect_left(self.keys, prefix)
+        for i in range(start, min(start + SCAN_LIMIT, len(self.keys))):
+            if not self.keys[i].startswith(prefix):
+                break
+            position, word_index = self.entries[i]
+            candidates[position] = min(candidates.get(position, 1), 1 if word_index else 0)
+
+        if popularity is not None:
+            for (table_name, name), _ in popularity.most_common(POPULAR_SCAN_LIMIT):
+                position = self.positions.get(Suggestion(name, table_name))
+                if position is None or position in candidates:
+                    continue
+                key = name.lower()
+                if key.startswith(prefix):
+                    candidates[position] = 0
+                elif ' ' + prefix in ' ' + key: # Prefix of a later word
+                    candidates[position] = 1
+
+        def rank(position):
+            suggestion = self.names[position]
+            searches = popularity.count(suggestion.table, suggestion.name) if popularity is not None else 0
+            return (-searches, candidates[position], len(suggestion.name), suggestion.name.lower())
+
+        return [self.names[position] for position in sorted(candidates, key=rank)[:limit]]
+
+
+def build_prefix_index(conn, table_names):
+    rows_by_table = {}
+    for table_name in table_names:
+        cursor = conn.execute(f"SELECT name FROM {table_name} ORDER BY id")
+        rows_by_table[table_name] = [row[0] for row in cursor.fetchall()]
+    return PrefixIndex(rows_by_table)
@@ -0,0 +1,83 @@
+import random
+import sqlite3
+import unittest
+
+from name_index import CATEGORY_SUFFIXES, NameIndex
+
+# --- NameIndex vs. the old SQL chain ---
+# NameIndex.resolve() must return the same row as the SQL fallback chain it
+# replaced (exact LOWER(name), singular form, category suffix, LIKE '%x%').
+# Both are run against random catalogs in an in-memory database:
+#
+#   python -m unittest test_name_index    (or: python -m pytest test_name_index.py)
+
+WORDS = ['betta', 'guppy', 'guppies', 'tetra', 'neon', 'java', 'fern', 'moss', 'cory', 'pie', 'pies',
+         'Fish', 'fish', 'plant', 'Plant', 'Amazon', 'sword', 'é', 'É', '%', '_', 'x']
+
+
+def sql_chain(cursor, table_name, search_name_lower):
+    # The lookup app.fetch_data_from_table used to run, returning the row id
+    def first(sql, value):
+        cursor.execute(f"SELECT id FROM {table_name} WHERE {sql}", (value,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    row_id = first("LOWER(name) = ?", search_name_lower)
+    if row_id is not None:
+        return row_id
+    if search_name_lower.endswith('ies'):
+        row_id = first("LOWER(name) = ?", search_name_lower[:-3] + 'y')
+    elif search_name_lower.endswith('s'):
+        row_id = first("LOWER(name) = ?", search_name_lower[:-1])
+    if row_id is not None:
+        return row_id
+    suffix = CATEGORY_SUFFIXES[table_name]
+    if suffix not in search_name_lower:
+        row_id = first("LOWER(name) = ?", search_name_lower + suffix)
+        if row_id is not None:
+            return row_id
+    return first("LOWER(name) LIKE ?", f"%{search_name_lower}%")
+
+
+def random_name(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+
+
+class NameIndexDifferentialTest(unittest.TestCase):
+    def check_catalog(self, table_name, names, queries):
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute(f"CREATE TABLE {table_name} (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+            conn.executemany(f"INSERT INTO {table_name} (name) VALUES (?)", [(name,) for name in names])
+            index = NameIndex(table_name, conn.execute(f"SELECT id, name FROM {table_name}").fetchall())
+            cursor = conn.cursor()
+            for query in queries:
+                expected = sql_chain(cursor, table_name, query)
+                self.assertEqual(index.resolve(query)[0], expected, f"{table_name} {names!r}: {query!r}")
+        finally:
+            conn.close()
+
+    def test_known_cases(self):
+        names = ['Guppy', 'Betta Fish', 'Guppies', 'Neon Tetra', 'Cory', 'Pie', 'Java Fern Plant',
+                 'Cat Fish Tank', 'Cat Fish Fish', 'Red Plant Mat', 'Red Plant Plant']
+        queries = ['guppy', 'guppies', 'bettas', 'betta', 'betta fish', 'tetra', 'tetras', 'cories', 'pies',
+                   'java fern', 'java', 'fish', 'cat fish', 'red plant', 'e', 'ty', '%', '_', 'n_on', 'zebra', '']
+        self.check_catalog('fish_species', names, queries)
+        self.check_catalog('plant_species', names, queries)
+
+    def test_random_catalogs(self):
+        rng = random.Random(1234)
+        for _ in range(200):
+            names = [random_name(rng) for _ in range(rng.randint(1, 12))]
+            queries = [name.lower() for name in names] # Every name, plus its variants and fragments
+            for name in names:
+                key = name.lower()
+                queries += [key + 's', key + 'es', key[:-1] + 'ies', key + ' fish', key + ' plant']
+                start = rng.randrange(len(key))
+                queries.append(key[start:start + rng.randint(1, 6)])
+            queries += [random_name(rng).lower() for _ in range(20)]
+            self.check_catalog(rng.choice(list(CATEGORY_SUFFIXES)), names, queries)
+
+
+if __name__ == '__main__':
+    unittest.main()